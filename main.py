@@ -6,19 +6,16 @@ YouTube 视频分析系统 - 主程序
 
 import os
 import sys
+import asyncio
 import logging
 import argparse
 import yaml
+from typing import Dict, List, Optional, Tuple
+from itertools import islice
 from pathlib import Path
 from dotenv import load_dotenv
 from colorama import init, Fore, Style
-
-# 导入模块
-from modules.youtube_fetcher import YouTubeFetcher
-from modules.audio_transcriber import AudioTranscriber
-from modules.content_analyzer import ContentAnalyzer
-from modules.style_summarizer import StyleSummarizer
-from modules.knowledge_base_generator import KnowledgeBaseGenerator
+from tqdm import tqdm
 
 
 # 初始化 colorama
@@ -94,14 +91,158 @@ def print_step(step: int, total: int, message: str):
     print(f"\n{Fore.GREEN}[步骤 {step}/{total}]{Style.RESET_ALL} {message}")
 
 
-def analyze_channel(channel_url: str, config: dict):
+async def run_pipeline(channel_url: str, config: dict) -> Tuple[List[Dict], List[Dict]]:
     """
-    分析 YouTube 频道
+    以流水线方式获取、转录、分析视频
+    
+    三个阶段通过队列衔接并发运行: 下一个视频下载时,上一个视频已在转录或分析,
+    总耗时约为最慢阶段的耗时,而不是各阶段耗时之和
+    
+    参数:
+        channel_url: YouTube 频道 URL
+        config: 配置字典
+        
+    返回:
+        (视频数据列表, 分析结果列表),两者顺序一致
+    """
+    # 在此处导入,避免 --help 等情况加载重量级依赖
+    from modules.youtube_fetcher import YouTubeFetcher
+    from modules.audio_transcriber import AudioTranscriber
+    from modules.content_analyzer import ContentAnalyzer
+    
+    logger = logging.getLogger(__name__)
+    use_cache = config.get("system", {}).get("cache_enabled", True)
+    
+    fetcher = YouTubeFetcher(config)
+    analyzer = ContentAnalyzer(config)
+    transcriber = None  # 首次遇到需要转录的视频时再加载模型
+    
+    videos = await asyncio.to_thread(fetcher.fetch_channel_videos, channel_url)
+    if not videos:
+        return [], []
+    
+    channel_name = videos[0]['channel']
+    cached_data = fetcher.load_cache(channel_name) if use_cache else None
+    
+    analyze_workers = max(1, analyzer.concurrency)
+    to_transcribe_q: asyncio.Queue = asyncio.Queue()
+    to_analyze_q: asyncio.Queue = asyncio.Queue()
+    # 按频道中的顺序存放 (并行获取时完成顺序不确定),获取失败的位置为 None
+    slots: List[Optional[Dict]] = [None] * len(cached_data or videos)
+    results: Dict[int, Dict] = {}
+    progress = tqdm(total=len(cached_data or videos), desc="处理视频")
+    
+    async def fetch_worker():
+        """获取视频详情并下载字幕/音频"""
+        if cached_data:
+            logger.info("使用缓存数据")
+            for index, details in enumerate(cached_data):
+                slots[index] = details
+                await to_transcribe_q.put((index, details))
+        else:
+            fetch_sem = asyncio.Semaphore(fetcher.concurrency)
+            
+            async def fetch_one(index, video):
+                async with fetch_sem:
+                    details = await fetcher.process_video_async(video)
+                if details:
+                    slots[index] = details
+                    await to_transcribe_q.put((index, details))
+                else:
+                    progress.update(1)
+            
+            # 多个视频并行获取,先完成的先进入转录/分析阶段
+            await asyncio.gather(*(fetch_one(index, video) for index, video in enumerate(videos)))
+        
+        await to_transcribe_q.put(None)
+    
+    async def transcribe_worker():
+        """转录没有字幕的视频"""
+        nonlocal transcriber
+        while (item := await to_transcribe_q.get()) is not None:
+            _, video = item
+            audio_file = video.get('audio_file')
+            if video.get('needs_transcription', False) and audio_file and os.path.exists(audio_file):
+                # 单个视频转录失败 (包括模型加载失败) 不影响其他视频,该视频仍进入分析阶段
+                try:
+                    if transcriber is None:
+                        transcriber = await asyncio.to_thread(AudioTranscriber, config, 1)
+                    transcription = await asyncio.to_thread(transcriber.transcribe, audio_file)
+                except Exception as e:
+                    transcription = {"text": "", "segments": [], "error": str(e)}
+                video['subtitle_text'] = transcription.get('text', '')
+                if transcription.get('error'):
+                    logger.error(f"转录 {audio_file} 失败: {transcription['error']}")
+            await to_analyze_q.put(item)
+        
+        for _ in range(analyze_workers):
+            await to_analyze_q.put(None)
+    
+    async def analyze_worker():
+        """分析视频内容 (队列中已就绪的视频最多 batch_size 个合并为一次 AI 请求)"""
+        done = False
+        while not done and (item := await to_analyze_q.get()) is not None:
+            batch = [item]
+            while len(batch) < analyzer.batch_size and not to_analyze_q.empty():
+                item = to_analyze_q.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            
+            videos = [video for _, video in batch]
+            try:
+                batch_results = await analyzer.analyze_videos_async(videos)
+            except Exception as e:
+                logger.error(f"分析视频 {', '.join(str(v.get('video_id')) for v in videos)} 时出错: {str(e)}")
+                batch_results = [
+                    {
+                        'video_id': video.get('video_id', 'unknown'),
+                        'title': video.get('title', ''),
+                        'analysis_status': 'failed',
+                        'error': str(e)
+                    }
+                    for video in videos
+                ]
+            for (index, _), result in zip(batch, batch_results):
+                results[index] = result
+            progress.update(len(batch))
+    
+    try:
+        await asyncio.gather(
+            fetch_worker(),
+            transcribe_worker(),
+            *[analyze_worker() for _ in range(analyze_workers)]
+        )
+        
+        indices = [index for index, details in enumerate(slots) if details]
+        videos_data = [slots[index] for index in indices]
+        
+        # 转录全部完成后再保存缓存 (流水线运行期间转录协程仍在修改视频数据)
+        if use_cache and not cached_data:
+            await asyncio.to_thread(fetcher.save_cache, channel_name, videos_data)
+    finally:
+        progress.close()
+        await analyzer.aclose()
+    
+    return videos_data, [results[index] for index in indices]
+
+
+def fetch_and_analyze(channel_url: str, config: dict) -> Tuple[List[Dict], List[Dict]]:
+    """
+    按阶段依次获取、转录、分析视频
     
     参数:
         channel_url: YouTube 频道 URL
         config: 配置字典
+        
+    返回:
+        (视频数据列表, 分析结果列表)
     """
+    from modules.youtube_fetcher import YouTubeFetcher
+    from modules.audio_transcriber import AudioTranscriber
+    from modules.content_analyzer import ContentAnalyzer
+    
     logger = logging.getLogger(__name__)
     
     print_step(1, 6, "获取频道视频数据...")
@@ -111,37 +252,38 @@ def analyze_channel(channel_url: str, config: dict):
     videos_data = fetcher.fetch_all(channel_url, use_cache=config.get("system", {}).get("cache_enabled", True))
     
     if not videos_data:
-        print(f"{Fore.RED}✗ 未获取到任何视频数据{Style.RESET_ALL}")
-        return
+        return [], []
     
     print(f"{Fore.GREEN}✓ 成功获取 {len(videos_data)} 个视频数据{Style.RESET_ALL}")
     
-    # 获取频道名称
-    channel_name = videos_data[0].get('channel', 'Unknown_Channel')
-    
     print_step(2, 6, "处理音频转录...")
     
     # 2. 音频转录(针对没有字幕的视频)
-    videos_need_transcription = [v for v in videos_data if v.get('needs_transcription', False)]
+    # 一次遍历同时统计需要转录的视频并收集存在音频文件的视频
+    need_transcription_count = 0
+    audio_videos = {}
+    for video in videos_data:
+        if video.get('needs_transcription', False):
+            need_transcription_count += 1
+            audio_file = video.get('audio_file')
+            if audio_file and os.path.exists(audio_file):
+                audio_videos[audio_file] = video
     
-    if videos_need_transcription:
-        print(f"需要转录 {len(videos_need_transcription)} 个视频的音频...")
+    if need_transcription_count:
+        print(f"需要转录 {need_transcription_count} 个视频的音频...")
         transcriber = AudioTranscriber(config)
         
-        for video in videos_need_transcription:
-            audio_file = video.get('audio_file')
-            if audio_file and os.path.exists(audio_file):
-                video_id = video.get('video_id')
-                print(f"  正在转录: {video_id}...")
-                
-                try:
-                    transcription = transcriber.transcribe(audio_file)
-                    video['subtitle_text'] = transcription.get('text', '')
-                    print(f"  {Fore.GREEN}✓ 转录完成{Style.RESET_ALL}")
-                except Exception as e:
-                    logger.error(f"转录失败: {str(e)}")
-                    print(f"  {Fore.YELLOW}⚠ 转录失败,将跳过该视频{Style.RESET_ALL}")
-                    video['subtitle_text'] = ''
+        # 一次性批量转录
+        transcriptions = transcriber.transcribe_batch(list(audio_videos))
+        
+        for audio_file, video in audio_videos.items():
+            transcription = transcriptions.get(audio_file, {})
+            video['subtitle_text'] = transcription.get('text', '')
+            if transcription.get('error'):
+                logger.error(f"转录失败: {transcription['error']}")
+                print(f"  {Fore.YELLOW}⚠ {video.get('video_id')} 转录失败,将跳过该视频{Style.RESET_ALL}")
+            else:
+                print(f"  {Fore.GREEN}✓ {video.get('video_id')} 转录完成{Style.RESET_ALL}")
     else:
         print(f"{Fore.GREEN}✓ 所有视频都有字幕,无需转录{Style.RESET_ALL}")
     
@@ -151,7 +293,37 @@ def analyze_channel(channel_url: str, config: dict):
     analyzer = ContentAnalyzer(config)
     analysis_results = analyzer.analyze_batch(videos_data)
     
-    successful_count = len([r for r in analysis_results if r.get('analysis_status') == 'success'])
+    return videos_data, analysis_results
+
+
+def analyze_channel(channel_url: str, config: dict):
+    """
+    分析 YouTube 频道
+    
+    参数:
+        channel_url: YouTube 频道 URL
+        config: 配置字典
+    """
+    from modules.style_summarizer import StyleSummarizer
+    from modules.knowledge_base_generator import KnowledgeBaseGenerator
+    
+    # 1-3. 获取、转录、分析视频
+    if config.get("system", {}).get("streaming_pipeline", True):
+        print_step(1, 6, "获取、转录并分析视频内容 (流水线并行)...")
+        videos_data, analysis_results = asyncio.run(run_pipeline(channel_url, config))
+        if videos_data:
+            print(f"{Fore.GREEN}✓ 成功获取 {len(videos_data)} 个视频数据{Style.RESET_ALL}")
+    else:
+        videos_data, analysis_results = fetch_and_analyze(channel_url, config)
+    
+    if not videos_data:
+        print(f"{Fore.RED}✗ 未获取到任何视频数据{Style.RESET_ALL}")
+        return
+    
+    # 获取频道名称
+    channel_name = videos_data[0].get('channel', 'Unknown_Channel')
+    
+    successful_count = sum(1 for r in analysis_results if r.get('analysis_status') == 'success')
     print(f"{Fore.GREEN}✓ 成功分析 {successful_count}/{len(analysis_results)} 个视频{Style.RESET_ALL}")
     
     print_step(4, 6, "总结频道风格...")
@@ -168,7 +340,7 @@ def analyze_channel(channel_url: str, config: dict):
         print(f"  主要类型: {summary.get('primary_type', 'N/A')}")
         print(f"  主要受众: {summary.get('primary_audience', 'N/A')}")
         
-        top_topics = list(summary.get('topics', {}).keys())[:3]
+        top_topics = list(islice(summary.get('topics', {}), 3))
         if top_topics:
             print(f"  高频主题: {', '.join(top_topics)}")
     else:
@@ -193,7 +365,10 @@ def analyze_channel(channel_url: str, config: dict):
     print(f"  - summary.md           (频道风格总结)")
     print(f"  - statistics.md        (详细统计数据)")
     print(f"  - learning_guide.md    (学习与模仿指南)")
-    print(f"  - videos/              (各视频详细分析)")
+    if (Path(output_dir) / "videos.tar").exists():
+        print(f"  - videos.tar           (各视频详细分析,打包)")
+    elif (Path(output_dir) / "videos").exists():
+        print(f"  - videos/              (各视频详细分析)")
     
     if config.get("knowledge_base", {}).get("generate_wordcloud", True):
         wordcloud_path = Path(output_dir) / "wordcloud.png"
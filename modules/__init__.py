@@ -12,11 +12,16 @@ YouTube 视频分析系统 - 核心模块包
 __version__ = "1.0.0"
 __author__ = "YouTube Analyzer"
 
-from .youtube_fetcher import YouTubeFetcher
-from .audio_transcriber import AudioTranscriber
-from .content_analyzer import ContentAnalyzer
-from .style_summarizer import StyleSummarizer
-from .knowledge_base_generator import KnowledgeBaseGenerator
+import importlib
+
+# 各类所在的子模块 (按需导入,避免 import modules 时就加载 faster-whisper、openai 等重量级依赖)
+_LAZY_IMPORTS = {
+    "YouTubeFetcher": ".youtube_fetcher",
+    "AudioTranscriber": ".audio_transcriber",
+    "ContentAnalyzer": ".content_analyzer",
+    "StyleSummarizer": ".style_summarizer",
+    "KnowledgeBaseGenerator": ".knowledge_base_generator",
+}
 
 __all__ = [
     "YouTubeFetcher",
@@ -26,3 +31,12 @@ __all__ = [
     "KnowledgeBaseGenerator",
 ]
 
+
+def __getattr__(name):
+    """首次访问时导入对应子模块 (PEP 562)"""
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
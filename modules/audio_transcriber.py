@@ -1,26 +1,80 @@
 """
 音频转录模块
 
-使用 OpenAI Whisper 模型将音频转换为文字
+使用 faster-whisper (CTranslate2) 将音频转换为文字
 """
 
 import os
+import json
+import hashlib
 import logging
 from typing import Optional, Dict
 from pathlib import Path
-import whisper
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from tqdm import tqdm
 
 
+@lru_cache(maxsize=4096)
+def _format_timestamp(seconds: int) -> str:
+    """
+    将秒数格式化为 MM:SS (相邻片段的结束/开始时间相同,缓存可复用)
+    
+    参数:
+        seconds: 整数秒
+        
+    返回:
+        格式化后的时间
+    """
+    minutes, secs = divmod(seconds, 60)
+    return f"{minutes:02d}:{secs:02d}"
+
+
+# 转录子进程中复用的转录器实例 (每个进程只加载一次模型)
+_worker_transcriber = None
+
+
+def _init_worker(config: Dict, cpu_threads: int):
+    """
+    转录子进程初始化函数
+    
+    参数:
+        config: 配置字典
+        cpu_threads: 每个子进程使用的 CPU 线程数
+    """
+    global _worker_transcriber
+    # 每个进程的线程数由 cpu_threads 限定 (CPU 核心在进程间平分),避免 CPU 超额订阅
+    _worker_transcriber = AudioTranscriber(config, num_workers=1, cpu_threads=cpu_threads)
+
+
+def _transcribe_one(audio_file: str, language: Optional[str] = None) -> Dict:
+    """
+    在子进程中转录单个音频文件
+    
+    参数:
+        audio_file: 音频文件路径
+        language: 语言代码
+        
+    返回:
+        转录结果字典
+    """
+    try:
+        return _worker_transcriber.transcribe(audio_file, language)
+    except Exception as e:
+        return {"text": "", "segments": [], "error": str(e)}
+
+
 class AudioTranscriber:
     """音频转录器"""
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, num_workers: Optional[int] = None, cpu_threads: Optional[int] = None):
         """
         初始化音频转录器
         
         参数:
             config: 配置字典
+            num_workers: 并行转录的进程数 (None 表示使用配置)
+            cpu_threads: 每个模型使用的 CPU 线程数 (None 表示使用配置)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -29,15 +83,56 @@ class AudioTranscriber:
         whisper_config = config.get("whisper", {})
         self.model_name = whisper_config.get("model", "base")
         self.language = whisper_config.get("language", "zh")
-        self.device = whisper_config.get("device", "cpu")
+        # 推理设备和计算类型在加载模型时解析 (检测 GPU 需要导入 CTranslate2,缓存命中时无需加载)
+        self.device = whisper_config.get("device", "auto")
+        self.compute_type = whisper_config.get("compute_type")
+        # 批量推理: 大于 1 时把同一音频的多个片段合并为一批送入模型 (GPU 上收益明显)
+        self.batch_size = whisper_config.get("batch_size", 1)
+        
+        # 并行配置: 多进程时每个进程平分 CPU 核心
+        cpu_count = os.cpu_count() or 1
+        if num_workers is None:
+            num_workers = whisper_config.get("num_workers", 1)
+        self.num_workers = max(1, num_workers)
+        if cpu_threads is None:
+            cpu_threads = whisper_config.get("cpu_threads", 0)
+        self.cpu_threads = cpu_threads or max(1, cpu_count // self.num_workers)
+        
+        # 转录结果缓存 (音频内容未变时直接复用)
+        self.cache_enabled = config.get("system", {}).get("cache_enabled", True)
+        self.cache_dir = Path("data") / "cache" / "transcripts"
+        if self.cache_enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # 加载 Whisper 模型
+        # Whisper 模型在首次需要转录时加载 (缓存命中时无需加载;多进程模式下由子进程各自加载)
         self.model = None
-        self._load_model()
+        self.pipeline = None
+    
+    def _resolve_device(self, device: str) -> str:
+        """
+        解析推理设备, auto 时有可用 GPU 则使用 cuda
+        
+        参数:
+            device: 配置的设备 (auto, cpu 或 cuda)
+            
+        返回:
+            实际使用的设备
+        """
+        if device != "auto":
+            return device
+        
+        try:
+            import ctranslate2
+            if ctranslate2.get_cuda_device_count() > 0:
+                return "cuda"
+        except Exception as e:
+            self.logger.debug(f"检测 GPU 失败: {str(e)}")
+        
+        return "cpu"
     
     def _load_model(self):
         """
-        加载 Whisper 模型
+        加载 Whisper 模型 (faster-whisper / CTranslate2 后端)
         
         模型大小说明:
         - tiny: 最快,但准确度较低 (~1GB RAM)
@@ -45,46 +140,56 @@ class AudioTranscriber:
         - small: 速度中等,准确度好 (~2GB RAM)
         - medium: 速度较慢,准确度高 (~5GB RAM)
         - large: 最慢,准确度最高 (~10GB RAM)
+        
+        CPU 上默认使用 int8 量化推理, GPU 上默认使用 float16
         """
         self.logger.info(f"正在加载 Whisper 模型: {self.model_name}")
         
+        # 延迟导入: 只有真正需要转录时才加载 CTranslate2
+        from faster_whisper import WhisperModel, BatchedInferencePipeline
+        
+        self.device = self._resolve_device(self.device)
+        # 计算类型: CPU 默认 int8 量化, GPU 默认 float16
+        if not self.compute_type:
+            self.compute_type = "int8" if self.device == "cpu" else "float16"
+        
         try:
-            # 尝试加载模型
-            self.model = whisper.load_model(self.model_name, device=self.device)
-            self.logger.info(f"Whisper 模型加载成功 (设备: {self.device})")
+            self.model = WhisperModel(
+                self.model_name,
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads
+            )
+            if self.batch_size > 1:
+                self.pipeline = BatchedInferencePipeline(model=self.model)
+            self.logger.info(f"Whisper 模型加载成功 (设备: {self.device}, 计算类型: {self.compute_type}, 批大小: {self.batch_size})")
         except Exception as e:
-            error_msg = str(e)
-            self.logger.error(f"加载 Whisper 模型失败: {error_msg}")
+            self.logger.error(f"加载 Whisper 模型失败: {str(e)}")
+            self.logger.error("如果模型文件损坏,请删除 ~/.cache/huggingface/hub 下对应的 faster-whisper 模型后重新运行程序")
+            raise
+    
+    def _cache_file(self, audio_file: str, language: str) -> Optional[Path]:
+        """
+        根据音频内容计算转录缓存文件路径
+        
+        使用文件前 1 MiB 内容和文件大小区分音频,避免读取整个文件
+        
+        参数:
+            audio_file: 音频文件路径
+            language: 转录语言
             
-            # 如果是 SHA256 校验和错误,尝试重新下载
-            if "SHA256" in error_msg or "checksum" in error_msg.lower():
-                self.logger.warning("检测到模型文件损坏,正在尝试重新下载...")
-                try:
-                    # 删除损坏的模型文件
-                    import os
-                    from pathlib import Path
-                    
-                    # Whisper 模型默认保存在 ~/.cache/whisper/
-                    cache_dir = Path.home() / ".cache" / "whisper"
-                    model_file = cache_dir / f"{self.model_name}.pt"
-                    
-                    if model_file.exists():
-                        self.logger.info(f"删除损坏的模型文件: {model_file}")
-                        model_file.unlink()
-                    
-                    # 重新下载模型
-                    self.logger.info("重新下载 Whisper 模型...")
-                    self.model = whisper.load_model(self.model_name, device=self.device, download_root=str(cache_dir))
-                    self.logger.info("Whisper 模型重新下载并加载成功!")
-                    
-                except Exception as retry_error:
-                    self.logger.error(f"重新下载模型失败: {str(retry_error)}")
-                    self.logger.error("请手动删除损坏的模型文件:")
-                    self.logger.error(f"  rm -rf ~/.cache/whisper/{self.model_name}.pt")
-                    self.logger.error("然后重新运行程序")
-                    raise
-            else:
-                raise
+        返回:
+            缓存文件路径,缓存未启用时返回 None
+        """
+        if not self.cache_enabled:
+            return None
+        
+        hasher = hashlib.blake2b()
+        with open(audio_file, 'rb') as f:
+            hasher.update(f.read(1 << 20))
+        hasher.update(f"|{os.path.getsize(audio_file)}|{self.model_name}|{language}".encode('utf-8'))
+        
+        return self.cache_dir / f"{hasher.hexdigest()}.json"
     
     def transcribe(self, audio_file: str, language: Optional[str] = None) -> Dict:
         """
@@ -106,28 +211,57 @@ class AudioTranscriber:
         # 使用指定语言或默认语言
         lang = language if language else self.language
         
+        cache_file = self._cache_file(audio_file, lang)
+        if cache_file is not None and cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+                self.logger.info(f"使用缓存的转录结果: {audio_file}")
+                return result
+            except Exception as e:
+                self.logger.warning(f"读取转录缓存失败: {str(e)}")
+        
+        if self.model is None:
+            self._load_model()
+        
         try:
             # 转录音频
-            # verbose=False: 不显示详细输出
             # language: 指定语言可以提高准确度
-            result = self.model.transcribe(
-                audio_file,
-                language=lang if lang != "auto" else None,
-                verbose=False
-            )
+            # vad_filter: 跳过静音片段,减少需要处理的音频时长
+            options = {
+                "language": lang if lang != "auto" else None,
+                "vad_filter": True,
+                "beam_size": 5,
+            }
+            if self.pipeline is not None:
+                segments_iter, info = self.pipeline.transcribe(audio_file, batch_size=self.batch_size, **options)
+            else:
+                segments_iter, info = self.model.transcribe(audio_file, **options)
             
-            # 提取文本
-            text = result.get("text", "").strip()
-            segments = result.get("segments", [])
+            # segments 是惰性生成器,遍历时才真正执行解码
+            segments = [
+                {"start": s.start, "end": s.end, "text": s.text}
+                for s in segments_iter
+            ]
+            text = "".join(s["text"] for s in segments).strip()
             
             self.logger.info(f"转录完成,文本长度: {len(text)} 字符")
             
-            return {
+            result = {
                 "text": text,
                 "segments": segments,
-                "language": result.get("language", lang)
+                "language": info.language or lang
             }
             
+            if cache_file is not None:
+                try:
+                    with open(cache_file, 'w', encoding='utf-8') as f:
+                        json.dump(result, f, ensure_ascii=False)
+                except Exception as e:
+                    self.logger.warning(f"保存转录缓存失败: {str(e)}")
+            
+            return result
+            
         except Exception as e:
             self.logger.error(f"转录音频失败: {str(e)}")
             return {"text": "", "segments": [], "error": str(e)}
@@ -146,16 +280,31 @@ class AudioTranscriber:
         self.logger.info(f"开始批量转录 {len(audio_files)} 个音频文件")
         
         results = {}
+        max_workers = min(len(audio_files), self.num_workers)
         
-        for audio_file in tqdm(audio_files, desc="转录音频"):
-            try:
-                result = self.transcribe(audio_file, language)
-                results[audio_file] = result
-            except Exception as e:
-                self.logger.error(f"转录 {audio_file} 时出错: {str(e)}")
-                results[audio_file] = {"text": "", "segments": [], "error": str(e)}
+        if max_workers > 1:
+            # 多进程并行转录,每个进程加载一份模型
+            self.logger.info(f"使用 {max_workers} 个进程并行转录 (每进程 {self.cpu_threads} 线程)")
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(self.config, self.cpu_threads)
+            ) as executor:
+                transcriptions = executor.map(_transcribe_one, audio_files, [language] * len(audio_files))
+                for audio_file, result in tqdm(zip(audio_files, transcriptions), total=len(audio_files), desc="转录音频"):
+                    if result.get("error"):
+                        self.logger.error(f"转录 {audio_file} 时出错: {result['error']}")
+                    results[audio_file] = result
+        else:
+            for audio_file in tqdm(audio_files, desc="转录音频"):
+                try:
+                    result = self.transcribe(audio_file, language)
+                    results[audio_file] = result
+                except Exception as e:
+                    self.logger.error(f"转录 {audio_file} 时出错: {str(e)}")
+                    results[audio_file] = {"text": "", "segments": [], "error": str(e)}
         
-        self.logger.info(f"批量转录完成,成功 {len([r for r in results.values() if r.get('text')])} 个")
+        self.logger.info(f"批量转录完成,成功 {sum(1 for r in results.values() if r.get('text'))} 个")
         
         return results
     
@@ -169,20 +318,12 @@ class AudioTranscriber:
         返回:
             格式化后的文本
         """
-        formatted_lines = []
-        
-        for segment in segments:
-            start = segment.get('start', 0)
-            end = segment.get('end', 0)
-            text = segment.get('text', '').strip()
-            
-            # 格式化时间 (秒转为 MM:SS)
-            start_time = f"{int(start // 60):02d}:{int(start % 60):02d}"
-            end_time = f"{int(end // 60):02d}:{int(end % 60):02d}"
-            
-            formatted_lines.append(f"[{start_time} - {end_time}] {text}")
-        
-        return '\n'.join(formatted_lines)
+        return '\n'.join(
+            f"[{_format_timestamp(int(segment.get('start', 0)))} - "
+            f"{_format_timestamp(int(segment.get('end', 0)))}] "
+            f"{segment.get('text', '').strip()}"
+            for segment in segments
+        )
     
     def save_transcription(self, audio_file: str, transcription: Dict, output_dir: str = "data/processed"):
         """
@@ -7,9 +7,85 @@
 import os
 import logging
 import json
-from typing import Dict, List, Optional
+import asyncio
+import orjson
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
 import re
 from collections import Counter
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import jieba
+    import jieba.analyse
+except ImportError:
+    jieba = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# 预编译正则: 中文词段、AI 返回中的 JSON 部分
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]+')
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+SYSTEM_PROMPT = "你是一个专业的视频内容分析专家,擅长分析 YouTube 视频的风格和特点。"
+
+# 单视频与多视频提示词共用的分析字段说明
+ANALYSIS_FIELDS = """1. video_type: 视频类型(如: 教程、娱乐、评测、Vlog、知识分享、搞笑、美食、旅游等)
+2. topics: 主要话题/主题(列表,3-5个关键词)
+3. style: 语言风格特点(如: 幽默风趣、专业严肃、口语化、激情澎湃等)
+4. tone: 语气特点(如: 轻松、正式、亲切、激励等)
+5. target_audience: 目标受众(如: 年轻人、专业人士、学生、大众等)
+6. content_structure: 内容结构特点(如: 开场引入、主体讲解、结尾总结)
+7. key_points: 核心要点(列表,2-3个要点)
+8. keywords: 高频关键词(列表,5-10个)
+9. engagement_techniques: 吸引观众的技巧(列表,如: 设置悬念、互动提问、视觉效果等)"""
+
+
+# 视频类型关键词
+TYPE_KEYWORDS = {
+    '教程': ['教程', '教学', '如何', '怎么', '方法', '技巧', '步骤'],
+    '评测': ['评测', '测评', '开箱', '体验', '使用', '对比'],
+    'Vlog': ['vlog', '日常', '生活', '分享', '记录'],
+    '知识分享': ['知识', '科普', '讲解', '介绍', '原理', '概念'],
+    '娱乐': ['搞笑', '有趣', '娱乐', '好玩', '趣味'],
+    '美食': ['美食', '做菜', '料理', '食谱', '烹饪'],
+    '旅游': ['旅游', '旅行', '游记', '景点', '风景'],
+}
+
+# 语言风格关键词
+STYLE_KEYWORDS = {
+    '幽默风趣': ['哈哈', '笑', '搞笑', '有趣'],
+    '专业严肃': ['专业', '技术', '研究', '分析'],
+    '口语化': ['我觉得', '其实', '就是', '然后'],
+    '激情澎湃': ['非常', '超级', '特别', '真的'],
+}
+
+
+def _is_retryable_error(error: BaseException) -> bool:
+    """
+    判断 AI 接口错误是否值得重试 (限流 429、服务端 5xx、网络连接错误)
+    
+    参数:
+        error: 捕获到的异常
+        
+    返回:
+        是否重试
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
 
 
 class ContentAnalyzer:
@@ -30,9 +106,52 @@ class ContentAnalyzer:
         self.use_ai = analysis_config.get("use_ai", True)
         self.ai_provider = analysis_config.get("ai_provider", "openai")
         self.min_subtitle_length = analysis_config.get("min_subtitle_length", 50)
+        self.concurrency = analysis_config.get("concurrency", 20)
+        self.batch_size = analysis_config.get("batch_size", 5)
+        # 按 token 截断字幕,并根据模型上下文长度计算可用的输出 token 数
+        self.max_subtitle_tokens = analysis_config.get("max_subtitle_tokens", 1500)
+        self.model_context = analysis_config.get("model_context", 16385)
+        self._encoding = None
+        
+        # 重试配置 (AI 接口限流或服务端错误时指数退避重试)
+        system_config = config.get("system", {})
+        self.retry_times = system_config.get("retry_times", 3)
+        self.retry_delay = system_config.get("retry_delay", 5)
+        
+        # 分析结果缓存 (字幕/标题/描述未变时跳过重复分析)
+        self.cache_enabled = system_config.get("cache_enabled", True)
+        self.cache_dir = Path("data") / "cache" / "analysis"
+        self.result_dir = self.cache_dir / "videos"
+        if self.cache_enabled:
+            self.result_dir.mkdir(parents=True, exist_ok=True)
+        # 增量分析清单 (视频 ID -> 字幕哈希),首次使用时加载
+        self._manifest: Optional[Dict[str, str]] = None
+        
+        # 关键词 -> 所属类别 [(kind, category), ...]
+        self._keyword_targets: Dict[str, List] = {}
+        for kind, groups in (('type', TYPE_KEYWORDS), ('style', STYLE_KEYWORDS)):
+            for category, keywords in groups.items():
+                for kw in keywords:
+                    self._keyword_targets.setdefault(kw, []).append((kind, category))
         
-        # 初始化 AI 客户端
+        # 用全部关键词构建 Aho-Corasick 自动机,一次扫描即可找出所有命中
+        self._keyword_automaton = None
+        if ahocorasick is not None:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for kw in self._keyword_targets:
+                self._keyword_automaton.add_word(kw, kw)
+            self._keyword_automaton.make_automaton()
+        
+        # 预先加载 jieba 词典,避免首次分析时才加载
+        if jieba is not None:
+            jieba.initialize()
+            if analysis_config.get("jieba_parallel", False) and os.name == 'posix':
+                jieba.enable_parallel(os.cpu_count())
+        
+        # 初始化 AI 客户端 (异步客户端在事件循环内按需创建,见 _ensure_async_client)
         self.ai_client = None
+        self.async_ai_client = None
+        self._api_key = None
         if self.use_ai:
             self._init_ai_client()
     
@@ -48,8 +167,8 @@ class ContentAnalyzer:
                     self.use_ai = False
                     return
                 
-                openai.api_key = api_key
-                self.ai_client = openai
+                self.ai_client = openai.OpenAI(api_key=api_key)
+                self._api_key = api_key
                 self.ai_model = self.config.get("api", {}).get("openai", {}).get("model", "gpt-3.5-turbo")
                 self.logger.info(f"已初始化 OpenAI 客户端 (模型: {self.ai_model})")
                 
@@ -63,6 +182,7 @@ class ContentAnalyzer:
                     return
                 
                 self.ai_client = anthropic.Anthropic(api_key=api_key)
+                self._api_key = api_key
                 self.ai_model = self.config.get("api", {}).get("anthropic", {}).get("model", "claude-3-haiku-20240307")
                 self.logger.info(f"已初始化 Anthropic 客户端 (模型: {self.ai_model})")
                 
@@ -73,6 +193,41 @@ class ContentAnalyzer:
             self.logger.error(f"初始化 AI 客户端失败: {str(e)}")
             self.use_ai = False
     
+    def _ensure_async_client(self):
+        """
+        创建异步 AI 客户端,共享一个大连接池的 httpx.AsyncClient
+        
+        连接池在整个批量分析期间复用,避免并发请求时反复建立 TLS 连接;
+        重试由 tenacity 负责,因此关闭 SDK 自带的重试
+        """
+        if self.async_ai_client is not None:
+            return
+        
+        import httpx
+        
+        pool_size = max(64, self.concurrency)
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(60.0)
+        )
+        
+        if self.ai_provider == "openai":
+            import openai
+            self.async_ai_client = openai.AsyncOpenAI(api_key=self._api_key, http_client=http_client, max_retries=0)
+        else:
+            import anthropic
+            self.async_ai_client = anthropic.AsyncAnthropic(api_key=self._api_key, http_client=http_client, max_retries=0)
+    
+    async def aclose(self):
+        """
+        保存增量分析清单,并关闭异步 AI 客户端及其连接池 (连接池绑定当前事件循环,不能跨 asyncio.run 复用)
+        """
+        if self._manifest is not None:
+            await asyncio.to_thread(self._save_manifest, self._manifest)
+        if self.async_ai_client is not None:
+            await self.async_ai_client.close()
+            self.async_ai_client = None
+    
     def analyze_video(self, video_data: Dict) -> Dict:
         """
         分析单个视频
@@ -91,13 +246,7 @@ class ContentAnalyzer:
         
         # 检查字幕长度
         if len(subtitle_text) < self.min_subtitle_length:
-            self.logger.warning(f"视频 {video_id} 字幕内容太短,跳过分析")
-            return {
-                'video_id': video_id,
-                'title': title,
-                'analysis_status': 'skipped',
-                'reason': '字幕内容太短'
-            }
+            return self._skipped_result(video_data)
         
         # 使用 AI 或关键词分析
         if self.use_ai and self.ai_client:
@@ -105,9 +254,9 @@ class ContentAnalyzer:
         else:
             return self._analyze_with_keywords(video_data)
     
-    def _analyze_with_ai(self, video_data: Dict) -> Dict:
+    async def analyze_video_async(self, video_data: Dict) -> Dict:
         """
-        使用 AI 进行深度分析
+        异步分析单个视频 (不阻塞事件循环)
         
         参数:
             video_data: 视频数据字典
@@ -115,15 +264,366 @@ class ContentAnalyzer:
         返回:
             分析结果字典
         """
+        return (await self.analyze_videos_async([video_data]))[0]
+    
+    async def analyze_videos_async(self, videos_data: List[Dict]) -> List[Dict]:
+        """
+        异步分析一组视频: 跳过字幕太短的视频,复用字幕未变化视频的上次结果,
+        其余使用 AI 时合并为一次请求,否则逐个进行关键词分析
+        
+        参数:
+            videos_data: 视频数据列表
+            
+        返回:
+            分析结果列表 (顺序与输入一致)
+        """
+        results: List[Optional[Dict]] = [None] * len(videos_data)
+        pending = []
+        
+        for i, video_data in enumerate(videos_data):
+            video_id = video_data.get('video_id', 'unknown')
+            self.logger.info(f"正在分析视频: {video_id} - {video_data.get('title', '')}")
+            
+            if len(video_data.get('subtitle_text', '')) < self.min_subtitle_length:
+                results[i] = self._skipped_result(video_data)
+                continue
+            
+            # 增量分析: 字幕未变化的视频直接复用上次的分析结果
+            content_hash, previous = self._reusable_result(video_data)
+            if previous:
+                self.logger.info(f"视频 {video_id} 字幕未变化,复用上次分析结果")
+                results[i] = previous
+            else:
+                pending.append((i, video_data, content_hash))
+        
+        if not pending:
+            return results
+        
+        videos = [video_data for _, video_data, _ in pending]
+        if self.use_ai and self.ai_client:
+            new_results = await self._analyze_with_ai_multi_async(videos)
+        else:
+            # 关键词分析是 CPU 计算,放到线程中执行
+            new_results = [await asyncio.to_thread(self._analyze_with_keywords, v) for v in videos]
+        
+        for (i, video_data, content_hash), result in zip(pending, new_results):
+            results[i] = result
+            self._record_result(video_data, content_hash, result)
+        
+        return results
+    
+    def _skipped_result(self, video_data: Dict) -> Dict:
+        """
+        构建字幕太短时的跳过结果
+        
+        参数:
+            video_data: 视频数据字典
+            
+        返回:
+            跳过分析的结果字典
+        """
+        video_id = video_data.get('video_id', 'unknown')
+        self.logger.warning(f"视频 {video_id} 字幕内容太短,跳过分析")
+        return {
+            'video_id': video_id,
+            'title': video_data.get('title', ''),
+            'analysis_status': 'skipped',
+            'reason': '字幕内容太短'
+        }
+    
+    def _cache_key(self, video_data: Dict, method: str) -> str:
+        """
+        计算分析结果的缓存键
+        
+        参数:
+            video_data: 视频数据字典
+            method: 分析方法 (AI 模型名或 keywords)
+            
+        返回:
+            缓存键
+        """
+        content = (
+            video_data.get('subtitle_text', '')
+            + video_data.get('title', '')
+            + (video_data.get('description') or '')
+        )
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        raw_key = f"{method}|{video_data.get('video_id', '')}|{content_hash}"
+        return hashlib.blake2b(raw_key.encode('utf-8')).hexdigest()
+    
+    def _load_cached_analysis(self, cache_key: str) -> Optional[Dict]:
+        """
+        从缓存加载分析结果
+        
+        参数:
+            cache_key: 缓存键
+            
+        返回:
+            分析结果字典,如果缓存不存在则返回 None
+        """
+        if not self.cache_enabled:
+            return None
+        
+        cache_file = self.cache_dir / f"{cache_key}.json"
+        if not cache_file.exists():
+            return None
+        
+        try:
+            return orjson.loads(cache_file.read_bytes())
+        except Exception as e:
+            self.logger.warning(f"读取分析缓存失败: {str(e)}")
+            return None
+    
+    def _save_cached_analysis(self, cache_key: str, analysis_result: Dict):
+        """
+        保存分析结果到缓存
+        
+        参数:
+            cache_key: 缓存键
+            analysis_result: 分析结果字典
+        """
+        if not self.cache_enabled:
+            return
+        
+        cache_file = self.cache_dir / f"{cache_key}.json"
+        try:
+            cache_file.write_bytes(orjson.dumps(analysis_result, option=orjson.OPT_NON_STR_KEYS))
+        except Exception as e:
+            self.logger.warning(f"保存分析缓存失败: {str(e)}")
+    
+    def _get_encoding(self):
+        """
+        获取当前模型的 tiktoken 编码器 (非 OpenAI 模型使用 cl100k_base 近似)
+        
+        返回:
+            编码器,tiktoken 不可用时返回 None
+        """
+        if self._encoding is None and tiktoken is not None:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(getattr(self, 'ai_model', ''))
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                self.logger.warning(f"加载 tiktoken 编码器失败,将按字符数估算: {str(e)}")
+                self._encoding = False
+        return self._encoding or None
+    
+    def _count_tokens(self, text: str) -> int:
+        """
+        计算文本 token 数 (tiktoken 不可用时按每字符 1 token 保守估算)
+        
+        参数:
+            text: 文本
+            
+        返回:
+            token 数
+        """
+        encoding = self._get_encoding()
+        if encoding is None:
+            return len(text)
+        return len(encoding.encode(text))
+    
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        """
+        按 token 数截断文本
+        
+        参数:
+            text: 文本
+            max_tokens: 最大 token 数
+            
+        返回:
+            截断后的文本
+        """
+        encoding = self._get_encoding()
+        if encoding is None:
+            # 退化为按字符截断 (中文约 1 token/字)
+            if len(text) > max_tokens:
+                return text[:max_tokens] + "..."
+            return text
+        
+        ids = encoding.encode(text)
+        if len(ids) > max_tokens:
+            # 截断处可能切开多字节字符,去掉解码出的替换符
+            return encoding.decode(ids[:max_tokens]).rstrip('\ufffd') + "..."
+        return text
+    
+    def _output_budget(self, prompt: str, max_tokens: int) -> int:
+        """
+        计算请求的 max_tokens: 不超过期望值,也不超过上下文剩余空间
+        
+        参数:
+            prompt: 提示词
+            max_tokens: 期望的最大输出 token 数
+            
+        返回:
+            实际使用的 max_tokens
+        """
+        prompt_tokens = self._count_tokens(SYSTEM_PROMPT) + self._count_tokens(prompt)
+        return max(256, min(max_tokens, self.model_context - prompt_tokens - 500))
+    
+    def _manifest_hash(self, video_data: Dict) -> str:
+        """
+        计算增量分析清单中记录的字幕哈希 (包含分析方法,切换模型后会重新分析)
+        
+        参数:
+            video_data: 视频数据字典
+            
+        返回:
+            哈希值
+        """
+        method = self.ai_model if self.use_ai and self.ai_client else 'keywords'
+        content = f"{method}|{video_data.get('subtitle_text', '')}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    def _configured_method(self) -> str:
+        """
+        当前配置的分析方法 (与分析结果中的 analysis_method 对应)
+        
+        返回:
+            ai 或 keywords
+        """
+        return 'ai' if self.use_ai and self.ai_client else 'keywords'
+    
+    def _get_manifest(self) -> Dict[str, str]:
+        """
+        获取增量分析清单 (首次使用时从磁盘加载)
+        
+        返回:
+            清单字典
+        """
+        if self._manifest is None:
+            self._manifest = self._load_manifest()
+        return self._manifest
+    
+    def _reusable_result(self, video_data: Dict) -> Tuple[str, Optional[Dict]]:
+        """
+        查找字幕未变化时可复用的上次分析结果
+        
+        参数:
+            video_data: 视频数据字典
+            
+        返回:
+            (字幕哈希, 上次的分析结果),不可复用时结果为 None
+        """
         video_id = video_data.get('video_id', '')
+        content_hash = self._manifest_hash(video_data)
+        if self._get_manifest().get(video_id) == content_hash:
+            return content_hash, self._load_previous_result(video_id)
+        return content_hash, None
+    
+    def _record_result(self, video_data: Dict, content_hash: str, result: Dict):
+        """
+        记录分析结果到增量分析清单
+        
+        只记录按当前配置方法完成的结果: AI 请求失败时降级得到的关键词结果不记录,下次仍会重新请求 AI
+        
+        参数:
+            video_data: 视频数据字典
+            content_hash: 字幕哈希
+            result: 分析结果字典
+        """
+        if result.get('analysis_method') != self._configured_method():
+            return
+        
+        video_id = video_data.get('video_id', '')
+        if self._save_previous_result(video_id, result):
+            self._get_manifest()[video_id] = content_hash
+    
+    def _load_manifest(self) -> Dict[str, str]:
+        """
+        加载增量分析清单 (视频 ID -> 字幕哈希)
+        
+        返回:
+            清单字典,缓存未启用或不存在时返回空字典
+        """
+        manifest_file = self.cache_dir.parent / "analysis_manifest.json"
+        if not self.cache_enabled or not manifest_file.exists():
+            return {}
+        
+        try:
+            return orjson.loads(manifest_file.read_bytes())
+        except Exception as e:
+            self.logger.warning(f"读取分析清单失败: {str(e)}")
+            return {}
+    
+    def _save_manifest(self, manifest: Dict[str, str]):
+        """
+        原子地保存增量分析清单 (先写临时文件再替换)
+        
+        参数:
+            manifest: 清单字典
+        """
+        if not self.cache_enabled:
+            return
+        
+        manifest_file = self.cache_dir.parent / "analysis_manifest.json"
+        tmp_file = manifest_file.with_suffix('.json.tmp')
+        try:
+            tmp_file.write_bytes(orjson.dumps(manifest))
+            os.replace(tmp_file, manifest_file)
+        except Exception as e:
+            self.logger.warning(f"保存分析清单失败: {str(e)}")
+    
+    def _load_previous_result(self, video_id: str) -> Optional[Dict]:
+        """
+        加载视频上次的分析结果
+        
+        参数:
+            video_id: 视频 ID
+            
+        返回:
+            分析结果字典,不存在时返回 None
+        """
+        result_file = self.result_dir / f"{video_id}.json"
+        if not result_file.exists():
+            return None
+        
+        try:
+            return orjson.loads(result_file.read_bytes())
+        except Exception as e:
+            self.logger.warning(f"读取上次分析结果失败: {str(e)}")
+            return None
+    
+    def _save_previous_result(self, video_id: str, analysis_result: Dict) -> bool:
+        """
+        保存视频的分析结果,供下次增量分析复用
+        
+        参数:
+            video_id: 视频 ID
+            analysis_result: 分析结果字典
+            
+        返回:
+            是否保存成功
+        """
+        if not self.cache_enabled:
+            return False
+        
+        try:
+            (self.result_dir / f"{video_id}.json").write_bytes(
+                orjson.dumps(analysis_result, option=orjson.OPT_NON_STR_KEYS)
+            )
+            return True
+        except Exception as e:
+            self.logger.warning(f"保存分析结果失败: {str(e)}")
+            return False
+    
+    def _build_prompt(self, video_data: Dict) -> str:
+        """
+        构建 AI 分析提示词
+        
+        参数:
+            video_data: 视频数据字典
+            
+        返回:
+            提示词文本
+        """
         title = video_data.get('title', '')
         description = video_data.get('description', '')
         subtitle_text = video_data.get('subtitle_text', '')
         
         # 截取字幕(避免太长)
-        max_subtitle_length = 3000
-        if len(subtitle_text) > max_subtitle_length:
-            subtitle_text = subtitle_text[:max_subtitle_length] + "..."
+        subtitle_text = self._truncate_tokens(subtitle_text, self.max_subtitle_tokens)
         
         # 构建提示词
         prompt = f"""请分析以下 YouTube 短视频的内容,并以 JSON 格式返回分析结果。
@@ -136,15 +636,7 @@ class ContentAnalyzer:
 {subtitle_text}
 
 请提供以下分析(用中文回答,以 JSON 格式返回):
-1. video_type: 视频类型(如: 教程、娱乐、评测、Vlog、知识分享、搞笑、美食、旅游等)
-2. topics: 主要话题/主题(列表,3-5个关键词)
-3. style: 语言风格特点(如: 幽默风趣、专业严肃、口语化、激情澎湃等)
-4. tone: 语气特点(如: 轻松、正式、亲切、激励等)
-5. target_audience: 目标受众(如: 年轻人、专业人士、学生、大众等)
-6. content_structure: 内容结构特点(如: 开场引入、主体讲解、结尾总结)
-7. key_points: 核心要点(列表,2-3个要点)
-8. keywords: 高频关键词(列表,5-10个)
-9. engagement_techniques: 吸引观众的技巧(列表,如: 设置悬念、互动提问、视觉效果等)
+{ANALYSIS_FIELDS}
 
 返回格式示例:
 {{
@@ -160,53 +652,241 @@ class ContentAnalyzer:
 }}
 
 请直接返回 JSON,不要包含其他说明文字。"""
+        
+        return prompt
+    
+    def _parse_ai_result(self, result_text: str, video_data: Dict) -> Dict:
+        """
+        解析 AI 返回的 JSON 结果
+        
+        参数:
+            result_text: AI 返回的文本
+            video_data: 视频数据字典
+            
+        返回:
+            分析结果字典
+            
+        异常:
+            orjson.JSONDecodeError: 返回内容不是合法 JSON
+        """
+        # 尝试提取 JSON 部分(有时 AI 会添加额外说明)
+        json_match = _JSON_RE.search(result_text)
+        if json_match:
+            result_text = json_match.group(0)
+        
+        analysis_result = orjson.loads(result_text)
+        return self._complete_ai_result(analysis_result, video_data)
+    
+    def _complete_ai_result(self, analysis_result: Dict, video_data: Dict) -> Dict:
+        """
+        为 AI 分析结果补充视频基本信息
+        
+        参数:
+            analysis_result: AI 返回的分析字典
+            video_data: 视频数据字典
+            
+        返回:
+            分析结果字典
+        """
+        analysis_result['video_id'] = video_data.get('video_id', '')
+        analysis_result['title'] = video_data.get('title', '')
+        analysis_result['analysis_status'] = 'success'
+        analysis_result['analysis_method'] = 'ai'
+        
+        return analysis_result
+    
+    def _build_multi_prompt(self, videos: List[Dict]) -> str:
+        """
+        构建一次分析多个视频的提示词
+        
+        参数:
+            videos: 视频数据列表
+            
+        返回:
+            提示词文本
+        """
+        # 多视频合并时每个视频的字幕预算适当缩小
+        max_subtitle_tokens = self.max_subtitle_tokens * 2 // 3
+        items = []
+        for video_data in videos:
+            subtitle_text = self._truncate_tokens(video_data.get('subtitle_text', ''), max_subtitle_tokens)
+            items.append({
+                'video_id': video_data.get('video_id', ''),
+                'title': video_data.get('title', ''),
+                'subtitle_text': subtitle_text,
+            })
+        
+        videos_json = orjson.dumps(items, option=orjson.OPT_INDENT_2).decode('utf-8')
+        
+        prompt = f"""请分别分析以下 {len(videos)} 个 YouTube 短视频的内容,并以 JSON 格式返回分析结果。
 
-        try:
-            if self.ai_provider == "openai":
-                # 使用 OpenAI API
-                response = self.ai_client.chat.completions.create(
-                    model=self.ai_model,
-                    messages=[
-                        {"role": "system", "content": "你是一个专业的视频内容分析专家,擅长分析 YouTube 视频的风格和特点。"},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=1000
-                )
-                
-                result_text = response.choices[0].message.content.strip()
-                
-            elif self.ai_provider == "anthropic":
-                # 使用 Anthropic API
-                response = self.ai_client.messages.create(
-                    model=self.ai_model,
-                    max_tokens=1000,
-                    temperature=0.3,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                result_text = response.content[0].text.strip()
+视频列表:
+{videos_json}
+
+请为每个视频提供以下分析(用中文回答):
+{ANALYSIS_FIELDS}
+
+返回格式:
+{{
+  "results": [
+    {{"video_id": "视频 ID", "video_type": "...", "topics": [...], "style": "...", "tone": "...", "target_audience": "...", "content_structure": "...", "key_points": [...], "keywords": [...], "engagement_techniques": [...]}}
+  ]
+}}
+
+results 中每个视频对应一项,video_id 必须与输入一致。请直接返回 JSON,不要包含其他说明文字。"""
+        
+        return prompt
+    
+    def _parse_multi_ai_result(self, result_text: str, videos: List[Dict]) -> Dict[str, Dict]:
+        """
+        解析多视频分析返回的 JSON 结果
+        
+        参数:
+            result_text: AI 返回的文本
+            videos: 本次请求的视频数据列表
             
-            # 解析 JSON 结果
-            # 尝试提取 JSON 部分(有时 AI 会添加额外说明)
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                result_text = json_match.group(0)
+        返回:
+            字典,键为视频 ID,值为分析结果 (缺失的视频不包含在内)
             
-            analysis_result = json.loads(result_text)
+        异常:
+            orjson.JSONDecodeError: 返回内容不是合法 JSON
+        """
+        json_match = _JSON_RE.search(result_text)
+        if json_match:
+            result_text = json_match.group(0)
+        
+        data = orjson.loads(result_text)
+        items = data.get('results', []) if isinstance(data, dict) else []
+        returned = {str(item.get('video_id')): item for item in items if isinstance(item, dict)}
+        
+        parsed = {}
+        for video_data in videos:
+            video_id = str(video_data.get('video_id', ''))
+            if video_id in returned:
+                parsed[video_id] = self._complete_ai_result(returned[video_id], video_data)
+        
+        return parsed
+    
+    def _request_ai(self, prompt: str, max_tokens: int = 1000) -> str:
+        """
+        调用 AI 接口 (同步)
+        
+        参数:
+            prompt: 提示词
+            max_tokens: 最大输出 token 数
             
-            # 添加基本信息
-            analysis_result['video_id'] = video_id
-            analysis_result['title'] = title
-            analysis_result['analysis_status'] = 'success'
-            analysis_result['analysis_method'] = 'ai'
+        返回:
+            AI 返回的文本
+        """
+        max_tokens = self._output_budget(prompt, max_tokens)
+        
+        if self.ai_provider == "openai":
+            # 使用 OpenAI API
+            response = self.ai_client.chat.completions.create(
+                model=self.ai_model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
+            )
+            return response.choices[0].message.content.strip()
+        
+        # 使用 Anthropic API
+        response = self.ai_client.messages.create(
+            model=self.ai_model,
+            max_tokens=max_tokens,
+            temperature=0.3,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.content[0].text.strip()
+    
+    async def _request_ai_async(self, prompt: str, max_tokens: int = 1000) -> str:
+        """
+        调用 AI 接口 (异步)
+        
+        参数:
+            prompt: 提示词
+            max_tokens: 最大输出 token 数
+            
+        返回:
+            AI 返回的文本
+        """
+        self._ensure_async_client()
+        max_tokens = self._output_budget(prompt, max_tokens)
+        
+        if self.ai_provider == "openai":
+            response = await self.async_ai_client.chat.completions.create(
+                model=self.ai_model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
+            )
+            return response.choices[0].message.content.strip()
+        
+        response = await self.async_ai_client.messages.create(
+            model=self.ai_model,
+            max_tokens=max_tokens,
+            temperature=0.3,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.content[0].text.strip()
+    
+    def _retry_policy(self) -> Dict:
+        """
+        AI 请求的重试策略 (仅对限流、5xx 和网络错误进行指数退避重试)
+        
+        返回:
+            tenacity 重试参数
+        """
+        return {
+            'stop': stop_after_attempt(self.retry_times),
+            'wait': wait_exponential(multiplier=self.retry_delay, max=60),
+            'retry': retry_if_exception(_is_retryable_error),
+            'reraise': True,
+        }
+    
+    def _analyze_with_ai(self, video_data: Dict) -> Dict:
+        """
+        使用 AI 进行深度分析
+        
+        参数:
+            video_data: 视频数据字典
+            
+        返回:
+            分析结果字典
+        """
+        video_id = video_data.get('video_id', '')
+        cache_key = self._cache_key(video_data, self.ai_model)
+        cached = self._load_cached_analysis(cache_key)
+        if cached:
+            self.logger.info(f"使用缓存的 AI 分析结果: {video_id}")
+            return cached
+        
+        prompt = self._build_prompt(video_data)
+        result_text = ''
+        
+        try:
+            for attempt in Retrying(**self._retry_policy()):
+                with attempt:
+                    result_text = self._request_ai(prompt)
             
+            analysis_result = self._parse_ai_result(result_text, video_data)
+            self._save_cached_analysis(cache_key, analysis_result)
             self.logger.info(f"AI 分析完成: {video_id}")
             return analysis_result
             
-        except json.JSONDecodeError as e:
+        except (orjson.JSONDecodeError, json.JSONDecodeError) as e:
             self.logger.error(f"解析 AI 返回的 JSON 失败: {str(e)}")
             self.logger.debug(f"AI 返回内容: {result_text}")
             # 降级使用关键词分析
@@ -217,6 +897,60 @@ class ContentAnalyzer:
             # 降级使用关键词分析
             return self._analyze_with_keywords(video_data)
     
+    async def _analyze_with_ai_async(self, video_data: Dict) -> Dict:
+        """
+        使用 AI 进行深度分析 (异步版本,供批量并发调用)
+        
+        参数:
+            video_data: 视频数据字典
+            
+        返回:
+            分析结果字典
+        """
+        video_id = video_data.get('video_id', '')
+        cache_key = self._cache_key(video_data, self.ai_model)
+        cached = self._load_cached_analysis(cache_key)
+        if cached:
+            self.logger.info(f"使用缓存的 AI 分析结果: {video_id}")
+            return cached
+        
+        prompt = self._build_prompt(video_data)
+        result_text = ''
+        
+        try:
+            async for attempt in AsyncRetrying(**self._retry_policy()):
+                with attempt:
+                    result_text = await self._request_ai_async(prompt)
+            
+            analysis_result = self._parse_ai_result(result_text, video_data)
+            self._save_cached_analysis(cache_key, analysis_result)
+            self.logger.info(f"AI 分析完成: {video_id}")
+            return analysis_result
+            
+        except (orjson.JSONDecodeError, json.JSONDecodeError) as e:
+            self.logger.error(f"解析 AI 返回的 JSON 失败: {str(e)}")
+            self.logger.debug(f"AI 返回内容: {result_text}")
+            return self._analyze_with_keywords(video_data)
+            
+        except Exception as e:
+            self.logger.error(f"AI 分析失败: {str(e)}")
+            return self._analyze_with_keywords(video_data)
+    
+    def _find_keywords(self, text: str) -> set:
+        """
+        找出文本中出现的所有类型/风格关键词
+        
+        参数:
+            text: 待匹配文本
+            
+        返回:
+            命中的关键词集合
+        """
+        if self._keyword_automaton is not None:
+            return {kw for _, kw in self._keyword_automaton.iter(text)}
+        # 没有 pyahocorasick 时退化为逐个子串查找
+        return {kw for kw in self._keyword_targets if kw in text}
+    
     def _analyze_with_keywords(self, video_data: Dict) -> Dict:
         """
         使用关键词规则进行简单分析
@@ -231,58 +965,45 @@ class ContentAnalyzer:
         title = video_data.get('title', '')
         subtitle_text = video_data.get('subtitle_text', '')
         
+        cache_key = self._cache_key(video_data, 'keywords')
+        cached = self._load_cached_analysis(cache_key)
+        if cached:
+            self.logger.info(f"使用缓存的关键词分析结果: {video_id}")
+            return cached
+        
         # 合并标题和字幕进行分析
         full_text = f"{title} {subtitle_text}"
         
-        # 视频类型关键词匹配
-        type_keywords = {
-            '教程': ['教程', '教学', '如何', '怎么', '方法', '技巧', '步骤'],
-            '评测': ['评测', '测评', '开箱', '体验', '使用', '对比'],
-            'Vlog': ['vlog', '日常', '生活', '分享', '记录'],
-            '知识分享': ['知识', '科普', '讲解', '介绍', '原理', '概念'],
-            '娱乐': ['搞笑', '有趣', '娱乐', '好玩', '趣味'],
-            '美食': ['美食', '做菜', '料理', '食谱', '烹饪'],
-            '旅游': ['旅游', '旅行', '游记', '景点', '风景'],
-        }
+        # 一次扫描匹配所有类型/风格关键词,统计每个类别命中的不同关键词数
+        found_keywords = self._find_keywords(full_text)
+        match_counts = Counter(
+            target for kw in found_keywords for target in self._keyword_targets[kw]
+        )
         
         # 匹配视频类型
         video_type = '其他'
         max_matches = 0
-        for vtype, keywords in type_keywords.items():
-            matches = sum(1 for kw in keywords if kw in full_text)
+        for vtype in TYPE_KEYWORDS:
+            matches = match_counts[('type', vtype)]
             if matches > max_matches:
                 max_matches = matches
                 video_type = vtype
         
         # 提取关键词(简单的词频统计)
         # 这里使用简单的中文分词
-        try:
-            import jieba
-            import jieba.analyse
-            
-            # 提取关键词
+        if jieba is not None:
+            # 提取关键词 (按权重排序,前 5 个即为主题)
             keywords = jieba.analyse.extract_tags(full_text, topK=10, withWeight=False)
-            topics = jieba.analyse.extract_tags(full_text, topK=5, withWeight=False)
-            
-        except ImportError:
+            topics = keywords[:5]
+        else:
             # 如果没有 jieba,使用简单的字符串分割
-            words = re.findall(r'[\u4e00-\u9fff]+', full_text)
+            words = _CJK_RE.findall(full_text)
             word_counts = Counter(words)
             keywords = [word for word, _ in word_counts.most_common(10)]
-            topics = [word for word, _ in word_counts.most_common(5)]
+            topics = keywords[:5]
         
         # 风格分析(基于关键词)
-        style_keywords = {
-            '幽默风趣': ['哈哈', '笑', '搞笑', '有趣'],
-            '专业严肃': ['专业', '技术', '研究', '分析'],
-            '口语化': ['我觉得', '其实', '就是', '然后'],
-            '激情澎湃': ['非常', '超级', '特别', '真的'],
-        }
-        
-        style = []
-        for s, kws in style_keywords.items():
-            if any(kw in full_text for kw in kws):
-                style.append(s)
+        style = [s for s in STYLE_KEYWORDS if match_counts[('style', s)]]
         
         if not style:
             style = ['自然流畅']
@@ -303,13 +1024,83 @@ class ContentAnalyzer:
             'analysis_method': 'keywords'
         }
         
+        self._save_cached_analysis(cache_key, analysis_result)
         self.logger.info(f"关键词分析完成: {video_id}")
         return analysis_result
     
+    async def _analyze_with_ai_multi_async(self, videos: List[Dict]) -> List[Dict]:
+        """
+        在一次 AI 请求中分析多个视频,解析失败或结果缺失时逐个重新分析;
+        请求本身失败 (重试已用尽) 时不再逐个请求,直接退回关键词分析
+        
+        参数:
+            videos: 视频数据列表
+            
+        返回:
+            分析结果列表 (顺序与输入一致)
+        """
+        if len(videos) == 1:
+            return [await self._analyze_with_ai_async(videos[0])]
+        
+        results: List[Optional[Dict]] = [None] * len(videos)
+        uncached = []
+        for i, video_data in enumerate(videos):
+            cache_key = self._cache_key(video_data, self.ai_model)
+            cached = self._load_cached_analysis(cache_key)
+            if cached:
+                results[i] = cached
+            else:
+                uncached.append((i, video_data, cache_key))
+        
+        if not uncached:
+            return results
+        
+        batch = [video_data for _, video_data, _ in uncached]
+        prompt = self._build_multi_prompt(batch)
+        result_text = ''
+        parsed = {}
+        request_failed = False
+        
+        try:
+            async for attempt in AsyncRetrying(**self._retry_policy()):
+                with attempt:
+                    result_text = await self._request_ai_async(prompt, max_tokens=min(4096, 1000 * len(batch)))
+            parsed = self._parse_multi_ai_result(result_text, batch)
+        except (orjson.JSONDecodeError, json.JSONDecodeError) as e:
+            self.logger.error(f"解析批量 AI 返回的 JSON 失败: {str(e)}")
+            self.logger.debug(f"AI 返回内容: {result_text}")
+        except Exception as e:
+            # 限流或超时等错误已经过重试,逐个请求只会放大请求量
+            self.logger.error(f"批量 AI 分析失败,改用关键词分析: {str(e)}")
+            request_failed = True
+        
+        missing = []
+        for i, video_data, cache_key in uncached:
+            analysis_result = parsed.get(str(video_data.get('video_id', '')))
+            if analysis_result:
+                self._save_cached_analysis(cache_key, analysis_result)
+                self.logger.info(f"AI 分析完成: {video_data.get('video_id', '')}")
+                results[i] = analysis_result
+            else:
+                missing.append((i, video_data))
+        
+        if missing:
+            if request_failed:
+                fallbacks = [asyncio.to_thread(self._analyze_with_keywords, video_data) for _, video_data in missing]
+            else:
+                # 解析失败或批量结果中缺失,单独重新分析
+                fallbacks = [self._analyze_with_ai_async(video_data) for _, video_data in missing]
+            for (i, _), analysis_result in zip(missing, await asyncio.gather(*fallbacks)):
+                results[i] = analysis_result
+        
+        return results
+    
     def analyze_batch(self, videos_data: List[Dict]) -> List[Dict]:
         """
         批量分析多个视频
         
+        使用 AI 时并发发送请求,否则逐个进行关键词分析
+        
         参数:
             videos_data: 视频数据列表
             
@@ -318,23 +1109,110 @@ class ContentAnalyzer:
         """
         self.logger.info(f"开始批量分析 {len(videos_data)} 个视频")
         
-        results = []
+        # 增量分析: 字幕未变化的视频直接复用上次的分析结果
+        results: List[Optional[Dict]] = [None] * len(videos_data)
+        pending = []
+        for i, video_data in enumerate(videos_data):
+            content_hash, previous = self._reusable_result(video_data)
+            if previous:
+                results[i] = previous
+            else:
+                pending.append((i, video_data, content_hash))
+        
+        if len(pending) < len(videos_data):
+            self.logger.info(f"{len(videos_data) - len(pending)} 个视频字幕未变化,复用上次分析结果")
+        
+        videos_to_analyze = [video_data for _, video_data, _ in pending]
+        
+        if self.use_ai and self.ai_client:
+            new_results = asyncio.run(self._analyze_batch_async(videos_to_analyze, self.concurrency, self.batch_size))
+        else:
+            new_results = []
+            from tqdm import tqdm
+            
+            for video_data in tqdm(videos_to_analyze, desc="分析视频内容"):
+                try:
+                    result = self.analyze_video(video_data)
+                    new_results.append(result)
+                except Exception as e:
+                    new_results.append(self._failed_result(video_data, e))
+        
+        for (i, video_data, content_hash), result in zip(pending, new_results):
+            results[i] = result
+            self._record_result(video_data, content_hash, result)
+        
+        self._save_manifest(self._get_manifest())
+        
+        self.logger.info(f"批量分析完成,成功 {sum(1 for r in results if r.get('analysis_status') == 'success')} 个")
+        
+        return results
+    
+    async def _analyze_batch_async(self, videos_data: List[Dict], concurrency: int = 20, batch_size: int = 5) -> List[Dict]:
+        """
+        并发分析多个视频
+        
+        每 batch_size 个视频合并为一次 AI 请求,用信号量限制同时进行的请求数
+        
+        参数:
+            videos_data: 视频数据列表
+            concurrency: 最大并发请求数
+            batch_size: 每次请求分析的视频数量
+            
+        返回:
+            分析结果列表 (顺序与输入一致)
+        """
         from tqdm import tqdm
         
-        for video_data in tqdm(videos_data, desc="分析视频内容"):
-            try:
-                result = self.analyze_video(video_data)
-                results.append(result)
-            except Exception as e:
-                self.logger.error(f"分析视频 {video_data.get('video_id')} 时出错: {str(e)}")
-                results.append({
-                    'video_id': video_data.get('video_id', 'unknown'),
-                    'title': video_data.get('title', ''),
-                    'analysis_status': 'failed',
-                    'error': str(e)
-                })
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        progress = tqdm(total=len(videos_data), desc="分析视频内容")
+        results: List[Optional[Dict]] = [None] * len(videos_data)
+        
+        # 字幕太短的视频直接跳过,其余按批次分组
+        pending = []
+        for i, video_data in enumerate(videos_data):
+            if len(video_data.get('subtitle_text', '')) < self.min_subtitle_length:
+                results[i] = self._skipped_result(video_data)
+                progress.update(1)
+            else:
+                pending.append((i, video_data))
+        
+        batch_size = max(1, batch_size)
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
         
-        self.logger.info(f"批量分析完成,成功 {len([r for r in results if r.get('analysis_status') == 'success'])} 个")
+        async def bounded(chunk: List) -> None:
+            videos = [video_data for _, video_data in chunk]
+            async with semaphore:
+                try:
+                    chunk_results = await self._analyze_with_ai_multi_async(videos)
+                except Exception as e:
+                    chunk_results = [self._failed_result(v, e) for v in videos]
+            for (i, _), result in zip(chunk, chunk_results):
+                results[i] = result
+            progress.update(len(chunk))
+        
+        try:
+            await asyncio.gather(*[bounded(c) for c in chunks])
+        finally:
+            progress.close()
+            await self.aclose()
         
         return results
-
+    
+    def _failed_result(self, video_data: Dict, error: Exception) -> Dict:
+        """
+        构建分析出错时的结果
+        
+        参数:
+            video_data: 视频数据字典
+            error: 捕获到的异常
+            
+        返回:
+            分析失败的结果字典
+        """
+        self.logger.error(f"分析视频 {video_data.get('video_id')} 时出错: {str(error)}")
+        return {
+            'video_id': video_data.get('video_id', 'unknown'),
+            'title': video_data.get('title', ''),
+            'analysis_status': 'failed',
+            'error': str(error)
+        }
@@ -4,11 +4,87 @@
 根据分析结果生成 Markdown 格式的知识库文档
 """
 
+import io
 import os
+import shutil
+import time
+import tarfile
 import logging
-from typing import Dict, List
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Tuple
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .style_summarizer import top_keys
+
+
+# 文件名中不允许出现的字符,统一替换为下划线
+_FILENAME_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# 文档写入缓冲区大小: 足以容纳整篇文档, 关闭文件时一次写出
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _write_document(path, parts: List[str]):
+    """
+    将文档片段拼接后一次编码为 UTF-8 写入文件
+    
+    以二进制模式写入,跳过文本包装层的逐次编码和换行转换
+    
+    参数:
+        path: 文件路径
+        parts: 文档片段列表
+    """
+    with open(path, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+        f.write(''.join(parts).encode('utf-8'))
+
+
+# 视频详情文档中结构固定的部分
+_VIDEO_HEADER_TMPL = (
+    "# {title}\n\n"
+    "## 📺 基本信息\n\n"
+    "- **视频 ID**: {video_id}\n"
+    "- **视频链接**: {url}\n"
+    "- **上传时间**: {upload_date}\n"
+    "- **时长**: {duration} 秒\n"
+    "- **观看数**: {view_count}\n"
+    "- **点赞数**: {like_count}\n\n"
+    "## 🔍 内容分析\n\n"
+    "- **视频类型**: {video_type}\n"
+    "- **语言风格**: {style}\n"
+    "- **语气**: {tone}\n"
+    "- **目标受众**: {target_audience}\n\n"
+)
+
+
+# 首次生成词云时创建的 WordCloud 实例 (同一进程内生成多个频道时复用)
+_wordcloud = None
+
+
+def _get_wordcloud():
+    """
+    延迟导入并缓存 WordCloud 实例
+    
+    generate_from_frequencies 每次调用都会重新布局,实例可以安全复用
+    
+    返回:
+        WordCloud 实例
+    """
+    global _wordcloud
+    if _wordcloud is None:
+        from wordcloud import WordCloud
+        _wordcloud = WordCloud(
+            width=1200,
+            height=600,
+            background_color='white',
+            font_path=None,  # 自动选择字体
+            max_words=100,
+            relative_scaling=0.5,
+            colormap='viridis'
+        )
+    return _wordcloud
 
 
 class KnowledgeBaseGenerator:
@@ -30,6 +106,9 @@ class KnowledgeBaseGenerator:
         kb_config = config.get("knowledge_base", {})
         self.include_video_details = kb_config.get("include_video_details", True)
         self.generate_wordcloud = kb_config.get("generate_wordcloud", True)
+        # 视频详情打包输出: auto 时视频数超过阈值才打包为 videos.tar
+        self.batch_video_output = kb_config.get("batch_video_output", "auto")
+        self.batch_video_threshold = kb_config.get("batch_video_threshold", 500)
     
     def generate(self, channel_name: str, summary: Dict, analysis_results: List[Dict], videos_data: List[Dict]) -> str:
         """
@@ -44,44 +123,48 @@ class KnowledgeBaseGenerator:
         返回:
             输出目录路径
         """
-        self.logger.info(f"开始生成知识库: {channel_name}")
+        self.logger.info("开始生成知识库: %s", channel_name)
         
         # 创建频道输出目录
         channel_dir = self.output_dir / self._sanitize_filename(channel_name)
         channel_dir.mkdir(parents=True, exist_ok=True)
         
+        # 本次生成的所有文档共用同一个生成时间
+        self._now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
         # 生成总结文档
-        summary_file = self._generate_summary_doc(channel_dir, channel_name, summary)
-        self.logger.info(f"已生成总结文档: {summary_file}")
+        summary_file = self._generate_summary_doc(channel_dir, channel_name, summary, self._now_str)
+        self.logger.info("已生成总结文档: %s", summary_file)
         
         # 生成统计数据文档
-        stats_file = self._generate_statistics_doc(channel_dir, channel_name, summary, analysis_results)
-        self.logger.info(f"已生成统计文档: {stats_file}")
+        stats_file = self._generate_statistics_doc(channel_dir, channel_name, summary, analysis_results, self._now_str)
+        self.logger.info("已生成统计文档: %s", stats_file)
         
         # 生成视频详情文档
         if self.include_video_details:
             videos_dir = channel_dir / "videos"
-            videos_dir.mkdir(exist_ok=True)
-            self._generate_video_details(videos_dir, analysis_results, videos_data)
-            self.logger.info(f"已生成视频详情文档: {videos_dir}")
+            videos_output = self._generate_video_details(videos_dir, analysis_results, videos_data)
+            self.logger.info("已生成视频详情文档: %s", videos_output)
         
         # 生成学习指南
-        guide_file = self._generate_learning_guide(channel_dir, channel_name, summary)
-        self.logger.info(f"已生成学习指南: {guide_file}")
+        guide_file = self._generate_learning_guide(channel_dir, channel_name, summary, self._now_str)
+        self.logger.info("已生成学习指南: %s", guide_file)
         
         # 生成词云(如果配置启用)
         if self.generate_wordcloud:
             try:
                 wordcloud_file = self._generate_wordcloud_image(channel_dir, summary)
                 if wordcloud_file:
-                    self.logger.info(f"已生成词云图: {wordcloud_file}")
+                    self.logger.info("已生成词云图: %s", wordcloud_file)
             except Exception as e:
                 self.logger.warning(f"生成词云失败: {str(e)}")
         
-        self.logger.info(f"知识库生成完成: {channel_dir}")
+        self.logger.info("知识库生成完成: %s", channel_dir)
         return str(channel_dir)
     
-    def _sanitize_filename(self, filename: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _sanitize_filename(filename: str) -> str:
         """
         清理文件名,移除不合法字符
         
@@ -91,12 +174,10 @@ class KnowledgeBaseGenerator:
         返回:
             清理后的文件名
         """
-        import re
         # 移除不合法字符
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-        return filename
+        return filename.translate(_FILENAME_TRANS)
     
-    def _generate_summary_doc(self, output_dir: Path, channel_name: str, summary: Dict) -> str:
+    def _generate_summary_doc(self, output_dir: Path, channel_name: str, summary: Dict, generated_at: str) -> str:
         """
         生成总结文档
         
@@ -104,101 +185,105 @@ class KnowledgeBaseGenerator:
             output_dir: 输出目录
             channel_name: 频道名称
             summary: 风格总结
+            generated_at: 生成时间
             
         返回:
             文档文件路径
         """
         summary_file = output_dir / "summary.md"
         
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            # 标题
-            f.write(f"# {channel_name} - 频道风格分析总结\n\n")
-            f.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("---\n\n")
-            
-            # 基本信息
-            f.write("## 📊 基本信息\n\n")
-            f.write(f"- **分析视频总数**: {summary.get('total_videos', 0)}\n")
-            f.write(f"- **成功分析数量**: {summary.get('analyzed_videos', 0)}\n")
-            f.write(f"- **主要内容类型**: {summary.get('primary_type', '未知')}\n")
-            f.write(f"- **主要目标受众**: {summary.get('primary_audience', '大众')}\n\n")
-            
-            # 视频类型分布
-            f.write("## 🎬 视频类型分布\n\n")
-            video_types = summary.get('video_types', {})
-            if video_types:
-                for vtype, count in video_types.items():
-                    percentage = (count / summary.get('analyzed_videos', 1)) * 100
-                    f.write(f"- **{vtype}**: {count} 个 ({percentage:.1f}%)\n")
-            f.write("\n")
-            
-            # 风格特点
-            f.write("## 🎨 风格特点\n\n")
-            style_features = summary.get('style_features', {})
-            if style_features:
-                for style, count in list(style_features.items())[:5]:
-                    f.write(f"- **{style}**: 出现 {count} 次\n")
-            f.write("\n")
-            
-            # 高频主题
-            f.write("## 📌 高频主题\n\n")
-            topics = summary.get('topics', {})
-            if topics:
-                for i, (topic, count) in enumerate(list(topics.items())[:10], 1):
-                    f.write(f"{i}. **{topic}** ({count} 次)\n")
-            f.write("\n")
-            
-            # 高频关键词
-            f.write("## 🔑 高频关键词\n\n")
-            keywords = summary.get('top_keywords', [])
-            if keywords:
-                # 每行显示 5 个关键词
-                for i in range(0, len(keywords), 5):
-                    kw_line = keywords[i:i+5]
-                    f.write(f"- {' · '.join(kw_line)}\n")
-            f.write("\n")
-            
-            # 标题特征
-            f.write("## 📝 标题特征\n\n")
-            title_patterns = summary.get('title_patterns', {})
-            if title_patterns:
-                avg_length = title_patterns.get('average_length', 0)
-                f.write(f"- **平均标题长度**: {avg_length} 字符\n\n")
-                
-                common_starts = title_patterns.get('common_starts', {})
-                if common_starts:
-                    f.write("**常见标题开头**:\n\n")
-                    for word, count in list(common_starts.items())[:5]:
-                        f.write(f"- `{word}` (使用 {count} 次)\n")
-                f.write("\n")
-                
-                punctuation = title_patterns.get('punctuation_usage', {})
-                if punctuation:
-                    f.write("**标点符号使用**:\n\n")
-                    for punc, count in punctuation.items():
-                        if count > 0:
-                            f.write(f"- {punc}: {count} 次\n")
-                f.write("\n")
-            
-            # 吸引观众技巧
-            f.write("## 💡 吸引观众技巧\n\n")
-            engagement = summary.get('engagement_techniques', {})
-            if engagement:
-                for i, (technique, count) in enumerate(list(engagement.items())[:10], 1):
-                    f.write(f"{i}. **{technique}** (使用 {count} 次)\n")
-            f.write("\n")
-            
-            # 内容结构模式
-            f.write("## 📋 内容结构模式\n\n")
-            content_patterns = summary.get('content_patterns', {})
-            if content_patterns:
-                for pattern, count in content_patterns.items():
-                    f.write(f"- **{pattern}**: {count} 个视频\n")
-            f.write("\n")
+        parts = []
+        
+        # 标题
+        parts.append(f"# {channel_name} - 频道风格分析总结\n\n")
+        parts.append(f"**生成时间**: {generated_at}\n\n")
+        parts.append("---\n\n")
+        
+        # 基本信息
+        parts.append("## 📊 基本信息\n\n")
+        parts.append(f"- **分析视频总数**: {summary.get('total_videos', 0)}\n")
+        parts.append(f"- **成功分析数量**: {summary.get('analyzed_videos', 0)}\n")
+        parts.append(f"- **主要内容类型**: {summary.get('primary_type', '未知')}\n")
+        parts.append(f"- **主要目标受众**: {summary.get('primary_audience', '大众')}\n\n")
+        
+        # 视频类型分布
+        parts.append("## 🎬 视频类型分布\n\n")
+        video_types = summary.get('video_types', {})
+        if video_types:
+            for vtype, count in video_types.items():
+                percentage = (count / summary.get('analyzed_videos', 1)) * 100
+                parts.append(f"- **{vtype}**: {count} 个 ({percentage:.1f}%)\n")
+        parts.append("\n")
+        
+        # 风格特点
+        parts.append("## 🎨 风格特点\n\n")
+        style_features = summary.get('style_features', {})
+        if style_features:
+            for style, count in islice(style_features.items(), 5):
+                parts.append(f"- **{style}**: 出现 {count} 次\n")
+        parts.append("\n")
+        
+        # 高频主题
+        parts.append("## 📌 高频主题\n\n")
+        topics = summary.get('topics', {})
+        if topics:
+            for i, (topic, count) in enumerate(islice(topics.items(), 10), 1):
+                parts.append(f"{i}. **{topic}** ({count} 次)\n")
+        parts.append("\n")
+        
+        # 高频关键词
+        parts.append("## 🔑 高频关键词\n\n")
+        keywords = summary.get('top_keywords', [])
+        if keywords:
+            # 每行显示 5 个关键词
+            for i in range(0, len(keywords), 5):
+                kw_line = keywords[i:i+5]
+                parts.append(f"- {' · '.join(kw_line)}\n")
+        parts.append("\n")
+        
+        # 标题特征
+        parts.append("## 📝 标题特征\n\n")
+        title_patterns = summary.get('title_patterns', {})
+        if title_patterns:
+            avg_length = title_patterns.get('average_length', 0)
+            parts.append(f"- **平均标题长度**: {avg_length} 字符\n\n")
+            
+            common_starts = title_patterns.get('common_starts', {})
+            if common_starts:
+                parts.append("**常见标题开头**:\n\n")
+                for word, count in islice(common_starts.items(), 5):
+                    parts.append(f"- `{word}` (使用 {count} 次)\n")
+            parts.append("\n")
+            
+            punctuation = title_patterns.get('punctuation_usage', {})
+            if punctuation:
+                parts.append("**标点符号使用**:\n\n")
+                for punc, count in punctuation.items():
+                    if count > 0:
+                        parts.append(f"- {punc}: {count} 次\n")
+            parts.append("\n")
+        
+        # 吸引观众技巧
+        parts.append("## 💡 吸引观众技巧\n\n")
+        engagement = summary.get('engagement_techniques', {})
+        if engagement:
+            for i, (technique, count) in enumerate(islice(engagement.items(), 10), 1):
+                parts.append(f"{i}. **{technique}** (使用 {count} 次)\n")
+        parts.append("\n")
+        
+        # 内容结构模式
+        parts.append("## 📋 内容结构模式\n\n")
+        content_patterns = summary.get('content_patterns', {})
+        if content_patterns:
+            for pattern, count in content_patterns.items():
+                parts.append(f"- **{pattern}**: {count} 个视频\n")
+        parts.append("\n")
+        
+        _write_document(summary_file, parts)
         
         return str(summary_file)
     
-    def _generate_statistics_doc(self, output_dir: Path, channel_name: str, summary: Dict, analysis_results: List[Dict]) -> str:
+    def _generate_statistics_doc(self, output_dir: Path, channel_name: str, summary: Dict, analysis_results: List[Dict], generated_at: str) -> str:
         """
         生成统计数据文档
         
@@ -207,157 +292,230 @@ class KnowledgeBaseGenerator:
             channel_name: 频道名称
             summary: 风格总结
             analysis_results: 分析结果列表
+            generated_at: 生成时间
             
         返回:
             文档文件路径
         """
         stats_file = output_dir / "statistics.md"
         
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            f.write(f"# {channel_name} - 详细统计数据\n\n")
-            f.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("---\n\n")
-            
-            # 视频分析状态统计
-            f.write("## 📈 分析状态统计\n\n")
-            successful = len([r for r in analysis_results if r.get('analysis_status') == 'success'])
-            failed = len([r for r in analysis_results if r.get('analysis_status') == 'failed'])
-            skipped = len([r for r in analysis_results if r.get('analysis_status') == 'skipped'])
-            
-            f.write(f"- ✅ 成功分析: {successful}\n")
-            f.write(f"- ❌ 分析失败: {failed}\n")
-            f.write(f"- ⏭️ 跳过分析: {skipped}\n\n")
-            
-            # 视频类型详细统计
-            f.write("## 🎬 视频类型详细统计\n\n")
-            video_types = summary.get('video_types', {})
-            total = sum(video_types.values())
-            
-            f.write("| 视频类型 | 数量 | 占比 |\n")
-            f.write("|---------|------|------|\n")
-            for vtype, count in video_types.items():
-                percentage = (count / total * 100) if total > 0 else 0
-                f.write(f"| {vtype} | {count} | {percentage:.1f}% |\n")
-            f.write("\n")
-            
-            # 主题统计
-            f.write("## 📌 主题统计 (Top 20)\n\n")
-            topics = summary.get('topics', {})
-            f.write("| 排名 | 主题 | 出现次数 |\n")
-            f.write("|------|------|----------|\n")
-            for i, (topic, count) in enumerate(list(topics.items())[:20], 1):
-                f.write(f"| {i} | {topic} | {count} |\n")
-            f.write("\n")
-            
-            # 风格特点统计
-            f.write("## 🎨 风格特点统计\n\n")
-            styles = summary.get('style_features', {})
-            f.write("| 风格特点 | 出现次数 |\n")
-            f.write("|----------|----------|\n")
-            for style, count in styles.items():
-                f.write(f"| {style} | {count} |\n")
-            f.write("\n")
-            
-            # 关键词统计
-            f.write("## 🔑 关键词统计\n\n")
-            keywords = summary.get('top_keywords', [])
-            f.write("| 排名 | 关键词 |\n")
-            f.write("|------|--------|\n")
-            for i, kw in enumerate(keywords, 1):
-                f.write(f"| {i} | {kw} |\n")
-            f.write("\n")
+        parts = []
+        
+        parts.append(f"# {channel_name} - 详细统计数据\n\n")
+        parts.append(f"**生成时间**: {generated_at}\n\n")
+        parts.append("---\n\n")
+        
+        # 视频分析状态统计
+        parts.append("## 📈 分析状态统计\n\n")
+        successful = len([r for r in analysis_results if r.get('analysis_status') == 'success'])
+        failed = len([r for r in analysis_results if r.get('analysis_status') == 'failed'])
+        skipped = len([r for r in analysis_results if r.get('analysis_status') == 'skipped'])
+        
+        parts.append(f"- ✅ 成功分析: {successful}\n")
+        parts.append(f"- ❌ 分析失败: {failed}\n")
+        parts.append(f"- ⏭️ 跳过分析: {skipped}\n\n")
+        
+        # 视频类型详细统计
+        parts.append("## 🎬 视频类型详细统计\n\n")
+        video_types = summary.get('video_types', {})
+        total = sum(video_types.values())
+        
+        parts.append("| 视频类型 | 数量 | 占比 |\n")
+        parts.append("|---------|------|------|\n")
+        parts.append(''.join(
+            "| %s | %s | %.1f%% |\n" % (vtype, count, (count / total * 100) if total > 0 else 0)
+            for vtype, count in video_types.items()
+        ))
+        parts.append("\n")
+        
+        # 主题统计
+        parts.append("## 📌 主题统计 (Top 20)\n\n")
+        topics = summary.get('topics', {})
+        parts.append("| 排名 | 主题 | 出现次数 |\n")
+        parts.append("|------|------|----------|\n")
+        parts.append(''.join(
+            "| %d | %s | %s |\n" % (i, topic, count)
+            for i, (topic, count) in enumerate(islice(topics.items(), 20), 1)
+        ))
+        parts.append("\n")
+        
+        # 风格特点统计
+        parts.append("## 🎨 风格特点统计\n\n")
+        styles = summary.get('style_features', {})
+        parts.append("| 风格特点 | 出现次数 |\n")
+        parts.append("|----------|----------|\n")
+        parts.append(''.join("| %s | %s |\n" % (style, count) for style, count in styles.items()))
+        parts.append("\n")
+        
+        # 关键词统计
+        parts.append("## 🔑 关键词统计\n\n")
+        keywords = summary.get('top_keywords', [])
+        parts.append("| 排名 | 关键词 |\n")
+        parts.append("|------|--------|\n")
+        parts.append(''.join("| %d | %s |\n" % (i, kw) for i, kw in enumerate(keywords, 1)))
+        parts.append("\n")
+        
+        _write_document(stats_file, parts)
         
         return str(stats_file)
     
-    def _generate_video_details(self, videos_dir: Path, analysis_results: List[Dict], videos_data: List[Dict]):
+    def _generate_video_details(self, videos_dir: Path, analysis_results: List[Dict], videos_data: List[Dict]) -> str:
         """
         生成每个视频的详细分析文档
         
+        每个视频写入独立文件,使用线程池并行生成;
+        视频数量很多时可打包写入单个 videos.tar,减少大量小文件的文件系统开销
+        
         参数:
             videos_dir: 视频详情目录
             analysis_results: 分析结果列表
             videos_data: 原始视频数据列表
+            
+        返回:
+            视频详情目录或打包文件路径
         """
-        # 创建视频数据映射
-        video_data_map = {v.get('video_id'): v for v in videos_data}
+        # 只为分析成功的视频生成文档,视频数据映射也只保留这些视频
+        successful = [a for a in analysis_results if a.get('analysis_status') == 'success']
+        video_ids = [a.get('video_id', 'unknown') for a in successful]
+        needed_ids = set(video_ids)
+        video_data_map = {v['video_id']: v for v in videos_data if v.get('video_id') in needed_ids}
         
-        for analysis in analysis_results:
-            if analysis.get('analysis_status') != 'success':
-                continue
-            
-            video_id = analysis.get('video_id', 'unknown')
-            title = analysis.get('title', 'Untitled')
-            
-            # 清理标题作为文件名
-            safe_title = self._sanitize_filename(title)[:50]  # 限制长度
-            video_file = videos_dir / f"{video_id}_{safe_title}.md"
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        
+        batch_output = self.batch_video_output
+        if batch_output == "auto":
+            batch_output = len(successful) > self.batch_video_threshold
+        
+        archive_file = videos_dir.parent / "videos.tar"
+        
+        if batch_output:
+            # 删除之前运行留下的逐个文件输出,避免与新的打包文件混淆
+            if videos_dir.exists():
+                shutil.rmtree(videos_dir)
+            mtime = time.time()
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                    tarfile.open(archive_file, 'w') as tar:
+                rendered = executor.map(
+                    self._render_video,
+                    successful,
+                    [video_data_map.get(video_id, {}) for video_id in video_ids]
+                )
+                for filename, content in rendered:
+                    data = content.encode('utf-8')
+                    info = tarfile.TarInfo(name=f"{videos_dir.name}/{filename}")
+                    info.size = len(data)
+                    info.mtime = mtime
+                    tar.addfile(info, io.BytesIO(data))
+            return str(archive_file)
+        
+        # 删除之前运行留下的打包文件,避免与新的逐个文件输出混淆
+        archive_file.unlink(missing_ok=True)
+        videos_dir.mkdir(exist_ok=True)
+        
+        # 目录前缀只转换一次,逐个文件拼接字符串路径
+        videos_dir_prefix = str(videos_dir) + os.sep
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self._write_one_video,
+                    videos_dir_prefix,
+                    analysis,
+                    video_data_map.get(video_id, {})
+                )
+                for analysis, video_id in zip(successful, video_ids)
+            ]
+            for future in futures:
+                future.result()
+        
+        return str(videos_dir)
+    
+    def _write_one_video(self, videos_dir_prefix: str, analysis: Dict, video_data: Dict):
+        """
+        生成单个视频的详细分析文档
+        
+        参数:
+            videos_dir_prefix: 视频详情目录路径 (以路径分隔符结尾)
+            analysis: 视频分析结果
+            video_data: 原始视频数据
+        """
+        filename, content = self._render_video(analysis, video_data)
+        _write_document(videos_dir_prefix + filename, [content])
+    
+    def _render_video(self, analysis: Dict, video_data: Dict) -> Tuple[str, str]:
+        """
+        渲染单个视频的详细分析文档
+        
+        参数:
+            analysis: 视频分析结果
+            video_data: 原始视频数据
             
-            with open(video_file, 'w', encoding='utf-8') as f:
-                f.write(f"# {title}\n\n")
-                
-                # 基本信息
-                video_data = video_data_map.get(video_id, {})
-                f.write("## 📺 基本信息\n\n")
-                f.write(f"- **视频 ID**: {video_id}\n")
-                f.write(f"- **视频链接**: {video_data.get('url', 'N/A')}\n")
-                f.write(f"- **上传时间**: {video_data.get('upload_date', 'N/A')}\n")
-                f.write(f"- **时长**: {video_data.get('duration', 0)} 秒\n")
-                f.write(f"- **观看数**: {video_data.get('view_count', 0):,}\n")
-                f.write(f"- **点赞数**: {video_data.get('like_count', 0):,}\n\n")
-                
-                # 内容分析
-                f.write("## 🔍 内容分析\n\n")
-                f.write(f"- **视频类型**: {analysis.get('video_type', 'N/A')}\n")
-                f.write(f"- **语言风格**: {analysis.get('style', 'N/A')}\n")
-                f.write(f"- **语气**: {analysis.get('tone', 'N/A')}\n")
-                f.write(f"- **目标受众**: {analysis.get('target_audience', 'N/A')}\n\n")
-                
-                # 主题和关键词
-                f.write("### 主要主题\n\n")
-                topics = analysis.get('topics', [])
-                if topics:
-                    for topic in topics:
-                        f.write(f"- {topic}\n")
-                f.write("\n")
-                
-                f.write("### 关键词\n\n")
-                keywords = analysis.get('keywords', [])
-                if keywords:
-                    f.write(f"{' · '.join(keywords[:10])}\n\n")
-                
-                # 内容结构
-                f.write("### 内容结构\n\n")
-                f.write(f"{analysis.get('content_structure', 'N/A')}\n\n")
-                
-                # 核心要点
-                f.write("### 核心要点\n\n")
-                key_points = analysis.get('key_points', [])
-                if key_points:
-                    for i, point in enumerate(key_points, 1):
-                        f.write(f"{i}. {point}\n")
-                f.write("\n")
-                
-                # 吸引技巧
-                f.write("### 吸引观众技巧\n\n")
-                techniques = analysis.get('engagement_techniques', [])
-                if techniques:
-                    for tech in techniques:
-                        f.write(f"- {tech}\n")
-                f.write("\n")
-                
-                # 字幕内容(节选)
-                subtitle_text = video_data.get('subtitle_text', '')
-                if subtitle_text:
-                    f.write("## 📝 字幕内容节选\n\n")
-                    f.write("```\n")
-                    # 只显示前 500 字符
-                    preview = subtitle_text[:500]
-                    if len(subtitle_text) > 500:
-                        preview += "..."
-                    f.write(preview)
-                    f.write("\n```\n\n")
+        返回:
+            (文件名, 文档内容) 元组
+        """
+        video_id = analysis.get('video_id', 'unknown')
+        title = analysis.get('title', 'Untitled')
+        
+        # 清理标题作为文件名
+        safe_title = self._sanitize_filename(title)[:50]  # 限制长度
+        filename = f"{video_id}_{safe_title}.md"
+        
+        # 固定结构部分通过模板一次格式化
+        parts = [_VIDEO_HEADER_TMPL.format_map({
+            'title': title,
+            'video_id': video_id,
+            'url': video_data.get('url', 'N/A'),
+            'upload_date': video_data.get('upload_date', 'N/A'),
+            'duration': video_data.get('duration', 0),
+            'view_count': f"{video_data.get('view_count', 0):,}",
+            'like_count': f"{video_data.get('like_count', 0):,}",
+            'video_type': analysis.get('video_type', 'N/A'),
+            'style': analysis.get('style', 'N/A'),
+            'tone': analysis.get('tone', 'N/A'),
+            'target_audience': analysis.get('target_audience', 'N/A'),
+        })]
+        
+        # 主题和关键词
+        parts.append("### 主要主题\n\n")
+        topics = analysis.get('topics', [])
+        if topics:
+            parts.append(''.join(f"- {topic}\n" for topic in topics))
+        parts.append("\n")
+        
+        parts.append("### 关键词\n\n")
+        keywords = analysis.get('keywords', [])
+        if keywords:
+            parts.append(f"{' · '.join(keywords[:10])}\n\n")
+        
+        # 内容结构
+        parts.append(f"### 内容结构\n\n{analysis.get('content_structure', 'N/A')}\n\n")
+        
+        # 核心要点
+        parts.append("### 核心要点\n\n")
+        key_points = analysis.get('key_points', [])
+        if key_points:
+            parts.append(''.join(f"{i}. {point}\n" for i, point in enumerate(key_points, 1)))
+        parts.append("\n")
+        
+        # 吸引技巧
+        parts.append("### 吸引观众技巧\n\n")
+        techniques = analysis.get('engagement_techniques', [])
+        if techniques:
+            parts.append(''.join(f"- {tech}\n" for tech in techniques))
+        parts.append("\n")
+        
+        # 字幕内容(节选)
+        subtitle_text = video_data.get('subtitle_text', '')
+        if subtitle_text:
+            # 只显示前 500 字符 (多取一个字符判断是否被截断,只对短切片求长度)
+            preview = subtitle_text[:501]
+            if len(preview) > 500:
+                preview = preview[:500] + "..."
+            parts.append(f"## 📝 字幕内容节选\n\n```\n{preview}\n```\n\n")
+        
+        return filename, ''.join(parts)
     
-    def _generate_learning_guide(self, output_dir: Path, channel_name: str, summary: Dict) -> str:
+    def _generate_learning_guide(self, output_dir: Path, channel_name: str, summary: Dict, generated_at: str) -> str:
         """
         生成学习指南
         
@@ -365,121 +523,122 @@ class KnowledgeBaseGenerator:
             output_dir: 输出目录
             channel_name: 频道名称
             summary: 风格总结
+            generated_at: 生成时间
             
         返回:
             文档文件路径
         """
         guide_file = output_dir / "learning_guide.md"
         
-        with open(guide_file, 'w', encoding='utf-8') as f:
-            f.write(f"# {channel_name} - 学习与模仿指南\n\n")
-            f.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("---\n\n")
-            
-            f.write("## 🎯 核心特征总结\n\n")
-            
-            # 内容定位
-            f.write("### 1. 内容定位\n\n")
-            primary_type = summary.get('primary_type', '未知')
-            f.write(f"该频道主要制作【{primary_type}】类型的视频,")
-            primary_audience = summary.get('primary_audience', '大众')
-            f.write(f"目标受众为【{primary_audience}】。\n\n")
-            
-            # 风格特点
-            f.write("### 2. 风格特点\n\n")
-            style_features = summary.get('style_features', {})
-            if style_features:
-                top_styles = list(style_features.keys())[:3]
-                f.write("该频道的语言风格特点:\n\n")
-                for style in top_styles:
-                    f.write(f"- {style}\n")
-            f.write("\n")
-            
-            # 内容主题
-            f.write("### 3. 内容主题\n\n")
-            topics = summary.get('topics', {})
-            if topics:
-                f.write("频道经常涉及的主题:\n\n")
-                for topic in list(topics.keys())[:10]:
-                    f.write(f"- {topic}\n")
-            f.write("\n")
-            
-            # 标题技巧
-            f.write("### 4. 标题技巧\n\n")
-            title_patterns = summary.get('title_patterns', {})
-            if title_patterns:
-                avg_length = title_patterns.get('average_length', 0)
-                f.write(f"- 标题平均长度: {avg_length} 字符\n")
-                
-                common_starts = title_patterns.get('common_starts', {})
-                if common_starts:
-                    f.write("- 常用开头词: ")
-                    f.write(", ".join(list(common_starts.keys())[:5]))
-                    f.write("\n")
-                
-                punctuation = title_patterns.get('punctuation_usage', {})
-                high_usage_punct = [p for p, c in punctuation.items() if c > 3]
-                if high_usage_punct:
-                    f.write(f"- 常用标点: {', '.join(high_usage_punct)}\n")
-            f.write("\n")
-            
-            # 吸引技巧
-            f.write("### 5. 吸引观众技巧\n\n")
-            engagement = summary.get('engagement_techniques', {})
-            if engagement:
-                f.write("该频道常用的吸引观众技巧:\n\n")
-                for i, technique in enumerate(list(engagement.keys())[:8], 1):
-                    f.write(f"{i}. {technique}\n")
-            f.write("\n")
-            
-            # 模仿建议
-            f.write("## 💡 模仿建议\n\n")
-            
-            f.write("### 内容创作方向\n\n")
-            f.write(f"1. **定位明确**: 聚焦于【{primary_type}】类型内容\n")
-            f.write(f"2. **受众定位**: 针对【{primary_audience}】创作内容\n")
-            if topics:
-                top_topics = list(topics.keys())[:5]
-                f.write(f"3. **主题选择**: 围绕 {', '.join(top_topics)} 等主题展开\n")
-            f.write("\n")
-            
-            f.write("### 风格塑造\n\n")
-            if style_features:
-                for i, style in enumerate(list(style_features.keys())[:3], 1):
-                    f.write(f"{i}. 保持【{style}】的表达方式\n")
-            f.write("\n")
-            
-            f.write("### 标题撰写\n\n")
-            if title_patterns:
-                avg_length = title_patterns.get('average_length', 0)
-                f.write(f"1. 标题长度控制在 {int(avg_length * 0.8)}-{int(avg_length * 1.2)} 字符左右\n")
-                
-                common_starts = title_patterns.get('common_starts', {})
-                if common_starts:
-                    f.write(f"2. 可以尝试使用「{list(common_starts.keys())[0]}」等开头\n")
-                
-                f.write("3. 善用标点符号增强吸引力\n")
-            f.write("\n")
-            
-            f.write("### 内容技巧\n\n")
-            if engagement:
-                techniques = list(engagement.keys())[:5]
-                for i, tech in enumerate(techniques, 1):
-                    f.write(f"{i}. {tech}\n")
-            f.write("\n")
+        # 各章节共用的总结数据,只取一次
+        primary_type = summary.get('primary_type', '未知')
+        primary_audience = summary.get('primary_audience', '大众')
+        style_keys = top_keys(summary.get('style_features', {}), 3)
+        topic_keys = top_keys(summary.get('topics', {}), 10)
+        title_patterns = summary.get('title_patterns') or {}
+        avg_length = title_patterns.get('average_length', 0)
+        common_start_keys = top_keys(title_patterns.get('common_starts', {}), 5)
+        engagement_keys = top_keys(summary.get('engagement_techniques', {}), 8)
+        
+        parts = []
+        
+        parts.append(f"# {channel_name} - 学习与模仿指南\n\n")
+        parts.append(f"**生成时间**: {generated_at}\n\n")
+        parts.append("---\n\n")
+        
+        parts.append("## 🎯 核心特征总结\n\n")
+        
+        # 内容定位
+        parts.append("### 1. 内容定位\n\n")
+        parts.append(f"该频道主要制作【{primary_type}】类型的视频,")
+        parts.append(f"目标受众为【{primary_audience}】。\n\n")
+        
+        # 风格特点
+        parts.append("### 2. 风格特点\n\n")
+        if style_keys:
+            parts.append("该频道的语言风格特点:\n\n")
+            for style in style_keys:
+                parts.append(f"- {style}\n")
+        parts.append("\n")
+        
+        # 内容主题
+        parts.append("### 3. 内容主题\n\n")
+        if topic_keys:
+            parts.append("频道经常涉及的主题:\n\n")
+            for topic in topic_keys:
+                parts.append(f"- {topic}\n")
+        parts.append("\n")
+        
+        # 标题技巧
+        parts.append("### 4. 标题技巧\n\n")
+        if title_patterns:
+            parts.append(f"- 标题平均长度: {avg_length} 字符\n")
+            
+            if common_start_keys:
+                parts.append("- 常用开头词: ")
+                parts.append(", ".join(common_start_keys))
+                parts.append("\n")
+            
+            punctuation = title_patterns.get('punctuation_usage', {})
+            high_usage_punct = [p for p, c in punctuation.items() if c > 3]
+            if high_usage_punct:
+                parts.append(f"- 常用标点: {', '.join(high_usage_punct)}\n")
+        parts.append("\n")
+        
+        # 吸引技巧
+        parts.append("### 5. 吸引观众技巧\n\n")
+        if engagement_keys:
+            parts.append("该频道常用的吸引观众技巧:\n\n")
+            for i, technique in enumerate(engagement_keys, 1):
+                parts.append(f"{i}. {technique}\n")
+        parts.append("\n")
+        
+        # 模仿建议
+        parts.append("## 💡 模仿建议\n\n")
+        
+        parts.append("### 内容创作方向\n\n")
+        parts.append(f"1. **定位明确**: 聚焦于【{primary_type}】类型内容\n")
+        parts.append(f"2. **受众定位**: 针对【{primary_audience}】创作内容\n")
+        if topic_keys:
+            parts.append(f"3. **主题选择**: 围绕 {', '.join(topic_keys[:5])} 等主题展开\n")
+        parts.append("\n")
+        
+        parts.append("### 风格塑造\n\n")
+        if style_keys:
+            for i, style in enumerate(style_keys, 1):
+                parts.append(f"{i}. 保持【{style}】的表达方式\n")
+        parts.append("\n")
+        
+        parts.append("### 标题撰写\n\n")
+        if title_patterns:
+            parts.append(f"1. 标题长度控制在 {int(avg_length * 0.8)}-{int(avg_length * 1.2)} 字符左右\n")
             
-            # 关键成功因素
-            f.write("## 🔑 关键成功因素\n\n")
-            f.write("基于分析,该频道的成功关键因素可能包括:\n\n")
-            f.write("1. **一致的风格定位**: 保持统一的内容类型和风格\n")
-            f.write("2. **明确的受众群体**: 了解并服务好目标受众\n")
-            f.write("3. **持续的主题深耕**: 在特定领域建立专业度\n")
-            if engagement:
-                f.write("4. **多样的互动技巧**: 运用多种方式吸引和留住观众\n")
-            f.write("\n")
+            if common_start_keys:
+                parts.append(f"2. 可以尝试使用「{common_start_keys[0]}」等开头\n")
             
-            f.write("---\n\n")
-            f.write("**注**: 以上分析基于视频内容的客观数据,模仿时请结合自身特点,形成独特风格。\n")
+            parts.append("3. 善用标点符号增强吸引力\n")
+        parts.append("\n")
+        
+        parts.append("### 内容技巧\n\n")
+        if engagement_keys:
+            for i, tech in enumerate(engagement_keys[:5], 1):
+                parts.append(f"{i}. {tech}\n")
+        parts.append("\n")
+        
+        # 关键成功因素
+        parts.append("## 🔑 关键成功因素\n\n")
+        parts.append("基于分析,该频道的成功关键因素可能包括:\n\n")
+        parts.append("1. **一致的风格定位**: 保持统一的内容类型和风格\n")
+        parts.append("2. **明确的受众群体**: 了解并服务好目标受众\n")
+        parts.append("3. **持续的主题深耕**: 在特定领域建立专业度\n")
+        if engagement_keys:
+            parts.append("4. **多样的互动技巧**: 运用多种方式吸引和留住观众\n")
+        parts.append("\n")
+        
+        parts.append("---\n\n")
+        parts.append("**注**: 以上分析基于视频内容的客观数据,模仿时请结合自身特点,形成独特风格。\n")
+        
+        _write_document(guide_file, parts)
         
         return str(guide_file)
     
@@ -495,9 +654,6 @@ class KnowledgeBaseGenerator:
             词云图文件路径
         """
         try:
-            from wordcloud import WordCloud
-            import matplotlib.pyplot as plt
-            
             # 获取关键词
             keywords = summary.get('top_keywords', [])
             if not keywords:
@@ -512,24 +668,11 @@ class KnowledgeBaseGenerator:
                 word_freq = {kw: len(keywords) - i for i, kw in enumerate(keywords)}
             
             # 生成词云
-            wordcloud = WordCloud(
-                width=1200,
-                height=600,
-                background_color='white',
-                font_path=None,  # 自动选择字体
-                max_words=100,
-                relative_scaling=0.5,
-                colormap='viridis'
-            ).generate_from_frequencies(word_freq)
+            wordcloud = _get_wordcloud().generate_from_frequencies(word_freq)
             
-            # 保存图片
+            # 保存图片 (WordCloud 自身渲染为 PIL 图像,直接写出,无需经过 matplotlib)
             wordcloud_file = output_dir / "wordcloud.png"
-            plt.figure(figsize=(12, 6))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            plt.tight_layout(pad=0)
-            plt.savefig(wordcloud_file, dpi=150, bbox_inches='tight')
-            plt.close()
+            wordcloud.to_file(str(wordcloud_file))
             
             return str(wordcloud_file)
             
@@ -7,9 +7,52 @@
 import logging
 from typing import Dict, List
 from collections import Counter
+from itertools import islice
 import json
 
 
+# 标题标点统计: 半角和全角符号归为同一类
+_PUNCTUATION_LABELS = ('问号(?)', '感叹号(!)', '冒号(:)', '括号()')
+_TITLE_PUNCTUATION = {
+    '?': '问号(?)', '\uff1f': '问号(?)',
+    '!': '感叹号(!)', '\uff01': '感叹号(!)',
+    ':': '冒号(:)', '\uff1a': '冒号(:)',
+    '(': '括号()', '\uff08': '括号()',
+}
+
+
+def top_keys(mapping: Dict, n: int) -> List:
+    """
+    取出按计数排序的字典中的前 n 个键
+    
+    参数:
+        mapping: 已按出现次数降序排列的字典
+        n: 数量
+        
+    返回:
+        键列表
+    """
+    return list(islice(mapping, n))
+
+
+def _field_values(value) -> tuple:
+    """
+    将分析结果中列表或字符串形式的字段统一为可迭代的取值
+    
+    参数:
+        value: 字段值
+        
+    返回:
+        列表原样返回,字符串包装为单元素元组,其他类型返回空元组
+    """
+    cls = value.__class__
+    if cls is list:
+        return value
+    if cls is str:
+        return (value,)
+    return ()
+
+
 class StyleSummarizer:
     """风格总结器"""
     
@@ -37,7 +80,7 @@ class StyleSummarizer:
         返回:
             总结结果字典
         """
-        self.logger.info(f"开始总结 {len(analysis_results)} 个视频的风格特征")
+        self.logger.info("开始总结 %s 个视频的风格特征", len(analysis_results))
         
         # 过滤成功分析的视频
         successful_analyses = [
@@ -54,31 +97,34 @@ class StyleSummarizer:
                 'message': '没有成功分析的视频'
             }
         
-        self.logger.info(f"成功分析了 {len(successful_analyses)} 个视频")
+        self.logger.info("成功分析了 %s 个视频", len(successful_analyses))
+        
+        # 单次遍历统计所有字段
+        counts = self._collect_counts(successful_analyses)
         
-        # 统计视频类型分布
-        video_types = self._analyze_video_types(successful_analyses)
+        # 统计视频类型分布 (按次数降序,第一项即主要类型)
+        video_types = dict(counts['video_types'].most_common())
         
         # 统计主题分布
-        topics_distribution = self._analyze_topics(successful_analyses)
+        topics_distribution = dict(counts['topics'].most_common(self.top_keywords))
         
         # 统计风格特点
-        style_features = self._analyze_styles(successful_analyses)
+        style_features = dict(counts['styles'].most_common(10))
         
         # 提取高频关键词
-        top_keywords = self._extract_top_keywords(successful_analyses)
+        top_keywords = [kw for kw, _ in counts['keywords'].most_common(self.top_keywords)]
         
         # 分析内容结构模式
-        content_patterns = self._analyze_content_patterns(successful_analyses)
+        content_patterns = dict(counts['content_patterns'].most_common(10))
         
         # 分析目标受众
-        target_audiences = self._analyze_target_audience(successful_analyses)
+        target_audiences = dict(counts['target_audiences'].most_common())
         
         # 提取吸引观众的技巧
-        engagement_techniques = self._analyze_engagement_techniques(successful_analyses)
+        engagement_techniques = dict(counts['engagement_techniques'].most_common(10))
         
         # 分析标题特征
-        title_patterns = self._analyze_title_patterns(successful_analyses)
+        title_patterns = self._analyze_title_patterns(counts['titles'])
         
         # 构建总结结果
         summary = {
@@ -88,7 +134,7 @@ class StyleSummarizer:
             
             # 视频类型分布
             'video_types': video_types,
-            'primary_type': max(video_types.items(), key=lambda x: x[1])[0] if video_types else '未知',
+            'primary_type': next(iter(video_types), '未知'),
             
             # 主题分布
             'topics': topics_distribution,
@@ -104,7 +150,7 @@ class StyleSummarizer:
             
             # 目标受众
             'target_audiences': target_audiences,
-            'primary_audience': max(target_audiences.items(), key=lambda x: x[1])[0] if target_audiences else '大众',
+            'primary_audience': next(iter(target_audiences), '大众'),
             
             # 吸引技巧
             'engagement_techniques': engagement_techniques,
@@ -116,145 +162,69 @@ class StyleSummarizer:
         self.logger.info("风格总结完成")
         return summary
     
-    def _analyze_video_types(self, analyses: List[Dict]) -> Dict[str, int]:
+    def _collect_counts(self, analyses: List[Dict]) -> Dict:
         """
-        统计视频类型分布
+        单次遍历分析结果,统计各字段的出现次数
         
         参数:
             analyses: 分析结果列表
             
         返回:
-            类型分布字典
+            计数字典,包含各字段的 Counter 以及标题列表
         """
-        types = [a.get('video_type', '其他') for a in analyses]
-        type_counts = Counter(types)
-        return dict(type_counts.most_common())
-    
-    def _analyze_topics(self, analyses: List[Dict]) -> Dict[str, int]:
-        """
-        统计主题分布
+        video_types = Counter()
+        topics = Counter()
+        styles = Counter()
+        keywords = Counter()
+        content_patterns = Counter()
+        target_audiences = Counter()
+        engagement_techniques = Counter()
+        titles = []
         
-        参数:
-            analyses: 分析结果列表
-            
-        返回:
-            主题分布字典
-        """
-        all_topics = []
         for a in analyses:
-            topics = a.get('topics', [])
-            if isinstance(topics, list):
-                all_topics.extend(topics)
-            elif isinstance(topics, str):
-                all_topics.append(topics)
-        
-        topic_counts = Counter(all_topics)
-        return dict(topic_counts.most_common(self.top_keywords))
-    
-    def _analyze_styles(self, analyses: List[Dict]) -> Dict[str, int]:
-        """
-        统计风格特点
-        
-        参数:
-            analyses: 分析结果列表
+            video_types[a.get('video_type', '其他')] += 1
+            
+            topics.update(_field_values(a.get('topics')))
             
-        返回:
-            风格分布字典
-        """
-        all_styles = []
-        for a in analyses:
             style = a.get('style', '')
-            if isinstance(style, list):
-                all_styles.extend(style)
-            elif isinstance(style, str):
+            if style.__class__ is str:
                 # 分割多个风格
-                styles = [s.strip() for s in style.split(',')]
-                all_styles.extend(styles)
-        
-        style_counts = Counter(all_styles)
-        return dict(style_counts.most_common(10))
-    
-    def _extract_top_keywords(self, analyses: List[Dict]) -> List[str]:
-        """
-        提取高频关键词
-        
-        参数:
-            analyses: 分析结果列表
+                styles.update(s.strip() for s in style.split(','))
+            else:
+                styles.update(_field_values(style))
             
-        返回:
-            关键词列表
-        """
-        all_keywords = []
-        for a in analyses:
-            keywords = a.get('keywords', [])
-            if isinstance(keywords, list):
-                all_keywords.extend(keywords)
-        
-        keyword_counts = Counter(all_keywords)
-        top_kws = [kw for kw, _ in keyword_counts.most_common(self.top_keywords)]
-        return top_kws
-    
-    def _analyze_content_patterns(self, analyses: List[Dict]) -> Dict[str, int]:
-        """
-        分析内容结构模式
-        
-        参数:
-            analyses: 分析结果列表
+            a_keywords = a.get('keywords')
+            if a_keywords.__class__ is list:
+                keywords.update(a_keywords)
             
-        返回:
-            内容模式分布字典
-        """
-        patterns = [a.get('content_structure', '标准结构') for a in analyses]
-        pattern_counts = Counter(patterns)
-        return dict(pattern_counts.most_common(10))
-    
-    def _analyze_target_audience(self, analyses: List[Dict]) -> Dict[str, int]:
-        """
-        分析目标受众
-        
-        参数:
-            analyses: 分析结果列表
+            content_patterns[a.get('content_structure', '标准结构')] += 1
+            target_audiences[a.get('target_audience', '大众')] += 1
             
-        返回:
-            受众分布字典
-        """
-        audiences = [a.get('target_audience', '大众') for a in analyses]
-        audience_counts = Counter(audiences)
-        return dict(audience_counts.most_common())
-    
-    def _analyze_engagement_techniques(self, analyses: List[Dict]) -> Dict[str, int]:
-        """
-        分析吸引观众的技巧
-        
-        参数:
-            analyses: 分析结果列表
+            engagement_techniques.update(_field_values(a.get('engagement_techniques')))
             
-        返回:
-            技巧分布字典
-        """
-        all_techniques = []
-        for a in analyses:
-            techniques = a.get('engagement_techniques', [])
-            if isinstance(techniques, list):
-                all_techniques.extend(techniques)
-            elif isinstance(techniques, str):
-                all_techniques.append(techniques)
-        
-        technique_counts = Counter(all_techniques)
-        return dict(technique_counts.most_common(10))
+            titles.append(a.get('title', ''))
+        
+        return {
+            'video_types': video_types,
+            'topics': topics,
+            'styles': styles,
+            'keywords': keywords,
+            'content_patterns': content_patterns,
+            'target_audiences': target_audiences,
+            'engagement_techniques': engagement_techniques,
+            'titles': titles,
+        }
     
-    def _analyze_title_patterns(self, analyses: List[Dict]) -> Dict:
+    def _analyze_title_patterns(self, titles: List[str]) -> Dict:
         """
         分析标题特征
         
         参数:
-            analyses: 分析结果列表
+            titles: 标题列表
             
         返回:
             标题特征字典
         """
-        titles = [a.get('title', '') for a in analyses]
-        
         # 统计标题长度
         title_lengths = [len(t) for t in titles]
         avg_length = sum(title_lengths) / len(title_lengths) if title_lengths else 0
@@ -269,12 +239,14 @@ class StyleSummarizer:
         first_word_counts = Counter(first_words)
         common_starts = dict(first_word_counts.most_common(10))
         
-        # 统计标题中的标点符号使用
+        # 统计标题中的标点符号使用 (每个标题每类标点只计一次)
+        punctuation_counts = Counter()
+        for title in titles:
+            punctuation_counts.update({
+                _TITLE_PUNCTUATION[ch] for ch in _TITLE_PUNCTUATION.keys() & set(title)
+            })
         punctuation_usage = {
-            '问号(?)': sum(1 for t in titles if '?' in t or '?' in t),
-            '感叹号(!)': sum(1 for t in titles if '!' in t or '!' in t),
-            '冒号(:)': sum(1 for t in titles if ':' in t or ':' in t),
-            '括号()': sum(1 for t in titles if '(' in t or '(' in t),
+            label: punctuation_counts.get(label, 0) for label in _PUNCTUATION_LABELS
         }
         
         return {
@@ -313,7 +285,7 @@ class StyleSummarizer:
         # 风格特点
         style_features = summary.get('style_features', {})
         if style_features:
-            top_styles = list(style_features.keys())[:3]
+            top_styles = top_keys(style_features, 3)
             description_parts.append(
                 f"语言风格特点: {', '.join(top_styles)}。"
             )
@@ -327,7 +299,7 @@ class StyleSummarizer:
         # 高频主题
         topics = summary.get('topics', {})
         if topics:
-            top_topics = list(topics.keys())[:5]
+            top_topics = top_keys(topics, 5)
             description_parts.append(
                 f"频繁讨论的主题包括: {', '.join(top_topics)}。"
             )
@@ -335,7 +307,7 @@ class StyleSummarizer:
         # 吸引技巧
         engagement = summary.get('engagement_techniques', {})
         if engagement:
-            top_techniques = list(engagement.keys())[:3]
+            top_techniques = top_keys(engagement, 3)
             description_parts.append(
                 f"常用的吸引观众技巧: {', '.join(top_techniques)}。"
             )
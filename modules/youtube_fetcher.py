@@ -5,14 +5,215 @@ YouTube 视频数据获取模块
 """
 
 import os
-import json
+import atexit
+import re
+import time
+import random
+import subprocess
 import logging
-from typing import Dict, List, Optional
+import asyncio
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
+from itertools import groupby, islice
+import orjson
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+from concurrent.futures import ThreadPoolExecutor
 import yt_dlp
+from yt_dlp.utils import DownloadError, ExtractorError
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
 from tqdm import tqdm
 
 
+# 视频信息缓存中不保存的字段 (体积大且过期快,缓存信息只用于整理视频详情)
+_INFO_CACHE_SKIP_KEYS = ('formats', 'requested_formats', 'requested_downloads', 'thumbnails', 'heatmap')
+
+# VTT 字幕中的文本行: 跳过 WEBVTT 头、时间戳行、纯数字序号行和空行,捕获去掉首尾空白后的内容
+_VTT_TEXT_RE = re.compile(
+    r'^(?![^\S\n]*(?:WEBVTT|\d+[^\S\n]*$))(?![^\n]*-->)[^\S\n]*(\S[^\n]*?)[^\S\n]*$',
+    re.MULTILINE
+)
+
+# 解析字幕时每次读取的字符数
+_VTT_READ_SIZE = 1 << 20
+
+# 未启用 TLS 指纹伪装时使用的浏览器 User-Agent
+_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# YouTube 限流/风控时错误信息中出现的标志
+_THROTTLE_MARKERS = ('HTTP Error 403', 'HTTP Error 429', 'Too Many Requests', 'Sign in to confirm')
+
+# 网络临时故障时错误信息中出现的标志 (DNS、连接中断、超时、服务端 5xx)
+_TRANSIENT_MARKERS = (
+    'timed out', 'Timeout', 'Temporary failure in name resolution', 'Name or service not known',
+    'Connection reset', 'Connection aborted', 'Connection refused', 'Remote end closed',
+    'IncompleteRead', 'HTTP Error 500', 'HTTP Error 502', 'HTTP Error 503', 'HTTP Error 504',
+)
+
+# yt-dlp 调用可能抛出的错误 (下载/提取失败,以及写文件时的系统错误)
+_YTDLP_ERRORS = (DownloadError, ExtractorError, OSError)
+
+
+def _is_throttle_error(error: BaseException) -> bool:
+    """
+    判断下载错误是否由 YouTube 限流或风控引起 (403/429、要求登录验证)
+    
+    参数:
+        error: 捕获到的异常
+        
+    返回:
+        是否为限流错误
+    """
+    message = str(error)
+    return any(marker in message for marker in _THROTTLE_MARKERS)
+
+
+def _is_transient_error(error: BaseException) -> bool:
+    """
+    判断 yt-dlp 错误是否为值得重试的网络临时故障 (限流和风控错误不重试,由限流跳过机制处理)
+    
+    参数:
+        error: 捕获到的异常
+        
+    返回:
+        是否重试
+    """
+    if not isinstance(error, (DownloadError, ExtractorError)) or _is_throttle_error(error):
+        return False
+    message = str(error)
+    return any(marker in message for marker in _TRANSIENT_MARKERS)
+
+
+def _transcode_audio(source_file: str, target_file: str, audio_quality: str) -> bool:
+    """
+    使用 ffmpeg 将下载的原始音频转码为目标格式,成功后删除原始文件
+    
+    参数:
+        source_file: 原始音频文件路径
+        target_file: 目标文件路径 (格式由扩展名决定)
+        audio_quality: 音频码率,如 128K
+        
+    返回:
+        是否转码成功
+    """
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-y', '-loglevel', 'error', '-i', source_file, '-vn', '-b:a', audio_quality, target_file],
+            capture_output=True
+        )
+    except OSError:
+        return False
+    
+    if result.returncode != 0:
+        return False
+    
+    os.remove(source_file)
+    return True
+
+
+class AdaptiveConcurrency:
+    """
+    自适应并发控制器
+    
+    按时间窗口统计下载吞吐量和限流错误,在 min_workers 与 max_workers 之间调整允许同时运行的任务数:
+    出现限流错误时并发数减半;吞吐量随并发增加而上升时加一;吞吐量明显下降时减一
+    """
+    
+    def __init__(self, min_workers: int = 1, max_workers: int = 8, adaptive: bool = True, window: float = 10.0):
+        """
+        初始化并发控制器
+        
+        参数:
+            min_workers: 最小并发数
+            max_workers: 最大并发数
+            adaptive: 是否自动调整 (False 时固定为 max_workers)
+            window: 统计窗口长度(秒)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.adaptive = adaptive
+        self.window = window
+        self.limit = self.min_workers if adaptive else self.max_workers
+        
+        self._cond = threading.Condition()
+        self._active = 0
+        self._saturated = False
+        self._bytes = 0
+        self._errors = 0
+        self._window_start = time.monotonic()
+        self._last_throughput = None
+    
+    def __enter__(self):
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+            if self._active >= self.limit:
+                self._saturated = True
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        with self._cond:
+            self._active -= 1
+            self._adjust()
+            self._cond.notify_all()
+        return False
+    
+    def record_bytes(self, num_bytes: int):
+        """
+        记录已完成下载的字节数
+        
+        参数:
+            num_bytes: 字节数
+        """
+        with self._cond:
+            self._bytes += num_bytes
+    
+    def record_error(self):
+        """记录一次限流错误"""
+        with self._cond:
+            self._errors += 1
+            self._adjust()
+    
+    def _adjust(self):
+        """统计窗口结束时根据吞吐量和错误数调整并发数 (调用方需持有锁)"""
+        if not self.adaptive:
+            return
+        
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.window and not self._errors:
+            return
+        
+        throughput = self._bytes / elapsed if elapsed > 0 else 0.0
+        old_limit = self.limit
+        
+        if self._errors:
+            # 被限流时迅速退让
+            self.limit = max(self.min_workers, self.limit // 2)
+        elif self._last_throughput is None or throughput >= self._last_throughput * 0.95:
+            # 并发已用满且吞吐量未下降,尝试增加并发
+            if self._saturated:
+                self.limit = min(self.max_workers, self.limit + 1)
+        elif throughput < self._last_throughput * 0.8:
+            self.limit = max(self.min_workers, self.limit - 1)
+        
+        if self.limit != old_limit:
+            self.logger.info(f"下载并发数调整: {old_limit} -> {self.limit} (吞吐量 {throughput / 1024:.0f} KB/s, 限流错误 {self._errors} 次)")
+        
+        # 限流退让后重新建立吞吐量基准
+        self._last_throughput = None if self._errors else throughput
+        self._bytes = 0
+        self._errors = 0
+        self._saturated = self._active >= self.limit
+        self._window_start = now
+
+
 class YouTubeFetcher:
     """YouTube 视频数据获取器"""
     
@@ -28,10 +229,14 @@ class YouTubeFetcher:
         self.data_dir = Path(data_dir)
         self.raw_dir = self.data_dir / "raw"
         self.cache_dir = self.data_dir / "cache"
+        self.subtitle_dir = self.raw_dir / "subtitles"
+        self.audio_dir = self.raw_dir / "audio"
         
-        # 创建必要的目录
+        # 创建必要的目录 (在此统一创建,避免并发处理视频时重复创建)
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.subtitle_dir.mkdir(exist_ok=True)
+        self.audio_dir.mkdir(exist_ok=True)
         
         # 设置日志
         self.logger = logging.getLogger(__name__)
@@ -41,6 +246,84 @@ class YouTubeFetcher:
         self.subtitle_languages = config.get("youtube", {}).get("subtitle_languages", ["zh-Hans", "zh", "en"])
         self.audio_format = config.get("youtube", {}).get("download_audio_format", "mp3")
         self.audio_quality = config.get("youtube", {}).get("audio_quality", "128K")
+        # 视频信息缓存: 字幕或音频已下载的视频,在有效期内再次处理时无需请求 YouTube
+        self.cache_enabled = config.get("system", {}).get("cache_enabled", True)
+        self.info_cache_dir = self.cache_dir / "info"
+        self.info_cache_ttl = config.get("youtube", {}).get("info_cache_ttl", 7 * 86400)
+        # 视频数据缓存是否缩进排版 (便于人工查看,写入更慢、文件更大)
+        self.cache_indent = config.get("system", {}).get("cache_indent", False)
+        # 视频数据缓存压缩级别 (需要安装 zstandard, 0 表示不压缩;缩进排版时不压缩)
+        self.cache_compress_level = config.get("system", {}).get("cache_compress_level", 3)
+        if zstandard is None or self.cache_indent:
+            self.cache_compress_level = 0
+        self._cache_suffix = ".json.zst" if self.cache_compress_level else ".json"
+        if self.cache_enabled:
+            self.info_cache_dir.mkdir(exist_ok=True)
+        
+        # 网络临时故障的重试次数和退避基数 (秒)
+        self.retry_times = config.get("system", {}).get("retry_times", 3)
+        self.retry_delay = config.get("system", {}).get("retry_delay", 5)
+        
+        # 浏览器 TLS 指纹伪装 (需要安装 yt-dlp[curl-cffi]): 使用浏览器一致的 TLS/HTTP2 指纹和可复用连接的会话,
+        # 降低 403 概率;伪装目标不可用时退回到固定的浏览器 User-Agent
+        self._network_opts = {'user_agent': _USER_AGENT}
+        impersonate = config.get("youtube", {}).get("impersonate", "chrome")
+        if impersonate:
+            target = self._resolve_impersonate_target(impersonate)
+            if target is not None:
+                self._network_opts = {'impersonate': target}
+        
+        # 请求节奏: 每次请求 YouTube 前随机等待,并让 yt-dlp 在下载之间同样随机等待,降低被识别为机器人的概率
+        request_sleep = config.get("youtube", {}).get("request_sleep", {})
+        self.min_sleep = request_sleep.get("min", 0)
+        self.max_sleep = max(self.min_sleep, request_sleep.get("max", 3))
+        self._pacing_opts = {}
+        if self.max_sleep > 0:
+            self._pacing_opts = {
+                'sleep_interval': max(self.min_sleep, 1),
+                'max_sleep_interval': max(self.max_sleep, 1),
+                'sleep_interval_subtitles': 1,
+            }
+        
+        # 被限流的视频在一段时间内跳过: {video_id: 跳过截止时间},保存在缓存目录中,跨运行有效
+        self.throttle_skip_ttl = config.get("youtube", {}).get("throttle_skip_ttl", 4 * 3600)
+        self.throttle_file = self.cache_dir / "throttled_videos.json"
+        self._throttle_lock = threading.Lock()
+        self._throttled_videos = self._load_throttled_videos()
+        
+        # 每个线程复用的 YoutubeDL 实例 (避免每个视频重新初始化提取器和网络会话)
+        self._ydl_local = threading.local()
+        
+        # 已创建的频道缓存目录 (避免每个视频都调用 mkdir)
+        self._channel_dirs = set()
+        
+        # 已下载文件索引 ({video_id: 字幕文件路径}, {已转码音频的 video_id}),首次使用时扫描目录
+        self._downloaded_index = None
+        self._downloaded_index_lock = threading.Lock()
+        
+        # 音频转码在后台执行 (ffmpeg 子进程占用 CPU),下载线程无需等待转码完成
+        self._transcode_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        
+        # 同时处理的视频数量 (获取详情、下载字幕和音频均为网络 I/O)
+        # 整数表示固定并发数; {min, max, adaptive} 表示根据吞吐量和限流错误自动调整
+        concurrency = config.get("youtube", {}).get("concurrency", 4)
+        if isinstance(concurrency, dict):
+            self.concurrency = max(1, concurrency.get("max", 8))
+            self.limiter = AdaptiveConcurrency(
+                concurrency.get("min", 1),
+                self.concurrency,
+                adaptive=concurrency.get("adaptive", True)
+            )
+        else:
+            self.concurrency = max(1, concurrency)
+            self.limiter = AdaptiveConcurrency(self.concurrency, self.concurrency, adaptive=False)
+        # 下载在独立线程池中执行: 等待并发控制器放行的下载线程不会占用默认线程池,
+        # 字幕解析、保存缓存等 asyncio.to_thread 调用无需排在它们后面
+        self._download_pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="yt-download")
+        
+        # 下载与解析之间的待处理队列: 队列满时下载等待,避免下载远超解析速度
+        self.work_queue_size = max(1, config.get("youtube", {}).get("work_queue_size", 32))
+        self.parse_workers = max(1, config.get("youtube", {}).get("parse_workers", 2))
         
     def fetch_channel_videos(self, channel_url: str) -> List[Dict]:
         """
@@ -52,6 +335,22 @@ class YouTubeFetcher:
         返回:
             视频信息列表
         """
+        videos = list(self.iter_channel_videos(channel_url))
+        self.logger.info(f"成功获取 {len(videos)} 个视频信息")
+        return videos
+    
+    def iter_channel_videos(self, channel_url: str) -> Iterator[Dict]:
+        """
+        逐个生成频道的视频基本信息
+        
+        播放列表按页惰性获取,调用方拿到第一个视频即可开始处理,无需等待整个频道列表分页完成
+        
+        参数:
+            channel_url: YouTube 频道 URL
+            
+        返回:
+            视频信息生成器
+        """
         self.logger.info(f"正在获取频道视频列表: {channel_url}")
         
         # 配置 yt-dlp 选项 - 只获取视频列表信息
@@ -59,54 +358,47 @@ class YouTubeFetcher:
             'quiet': True,
             'no_warnings': True,
             'extract_flat': 'in_playlist',  # 只提取播放列表信息,不下载
-            'playlistend': self.max_videos if self.max_videos > 0 else None,  # 限制视频数量
+            'lazy_playlist': True,  # 按页获取播放列表
+            **self._network_opts,
+            **self._pacing_opts,
         }
         
-        videos = []
-        
         try:
+            self._sleep_before_request()
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # 提取频道信息
+                # 提取频道信息 (不处理条目,entries 为按页获取的生成器)
                 self.logger.info("正在提取频道信息...")
-                playlist_info = ydl.extract_info(channel_url, download=False)
+                playlist_info = self._retrying(ydl.extract_info, channel_url, download=False, process=False)
                 
                 if playlist_info is None:
                     self.logger.error("无法获取频道信息")
-                    return []
+                    return
                 
                 # 获取频道名称
                 channel_name = playlist_info.get('channel', playlist_info.get('uploader', 'unknown'))
                 self.logger.info(f"频道名称: {channel_name}")
                 
-                # 获取视频列表
-                entries = playlist_info.get('entries', [])
-                
-                if not entries:
-                    self.logger.warning("频道中没有找到视频")
-                    return []
-                
-                self.logger.info(f"找到 {len(entries)} 个视频")
+                # 获取视频列表 (限制视频数量)
+                entries = (entry for entry in playlist_info.get('entries') or () if entry is not None)
+                count = 0
                 
                 # 提取每个视频的基本信息
-                for entry in entries:
-                    if entry is None:
-                        continue
-                        
-                    video_info = {
+                for entry in islice(entries, self.max_videos if self.max_videos > 0 else None):
+                    count += 1
+                    yield {
                         'video_id': entry.get('id'),
                         'title': entry.get('title', ''),
                         'url': f"https://www.youtube.com/watch?v={entry.get('id')}",
                         'duration': entry.get('duration', 0),
                         'channel': channel_name,
                     }
-                    videos.append(video_info)
+                
+                if not count:
+                    self.logger.warning("频道中没有找到视频")
                     
-        except Exception as e:
+        except _YTDLP_ERRORS as e:
             self.logger.error(f"获取频道视频列表失败: {str(e)}")
             raise
-            
-        self.logger.info(f"成功获取 {len(videos)} 个视频信息")
-        return videos
     
     def fetch_video_details(self, video_url: str) -> Dict:
         """
@@ -129,45 +421,316 @@ class YouTubeFetcher:
             'skip_download': True,
             # 防止403错误的配置
             'nocheckcertificate': True,
-            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            **self._network_opts,  # 浏览器 TLS 指纹伪装或 User-Agent
             'referer': 'https://www.youtube.com/',
+            **self._pacing_opts,
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
-                
-                if info is None:
-                    self.logger.error(f"无法获取视频信息: {video_url}")
-                    return {}
-                
-                # 提取关键信息
-                video_details = {
-                    'video_id': info.get('id'),
-                    'title': info.get('title', ''),
-                    'description': info.get('description', ''),
-                    'duration': info.get('duration', 0),
-                    'view_count': info.get('view_count', 0),
-                    'like_count': info.get('like_count', 0),
-                    'upload_date': info.get('upload_date', ''),
-                    'uploader': info.get('uploader', ''),
-                    'channel': info.get('channel', ''),
-                    'channel_id': info.get('channel_id', ''),
-                    'tags': info.get('tags', []),
-                    'categories': info.get('categories', []),
-                    'url': video_url,
-                    'has_subtitles': bool(info.get('subtitles')),
-                    'has_automatic_captions': bool(info.get('automatic_captions')),
-                    'available_subtitles': list(info.get('subtitles', {}).keys()),
-                    'available_automatic_captions': list(info.get('automatic_captions', {}).keys()),
-                }
-                
-                return video_details
-                
-        except Exception as e:
+            self._sleep_before_request()
+            ydl = self._get_ydl('details', ydl_opts)
+            info = self._retrying(ydl.extract_info, video_url, download=False)
+            
+            if info is None:
+                self.logger.error(f"无法获取视频信息: {video_url}")
+                return {}
+            
+            return self._build_video_details(info, video_url)
+            
+        except _YTDLP_ERRORS as e:
             self.logger.error(f"获取视频详情失败: {str(e)}")
+            if _is_throttle_error(e):
+                self.limiter.record_error()
             return {}
     
+    def _build_video_details(self, info: Dict, video_url: str) -> Dict:
+        """
+        从 yt-dlp 提取的信息中整理视频详情
+        
+        参数:
+            info: yt-dlp 返回的视频信息
+            video_url: 视频 URL
+            
+        返回:
+            视频详细信息字典
+        """
+        return {
+            'video_id': info.get('id'),
+            'title': info.get('title', ''),
+            'description': info.get('description', ''),
+            'duration': info.get('duration', 0),
+            'view_count': info.get('view_count', 0),
+            'like_count': info.get('like_count', 0),
+            'upload_date': info.get('upload_date', ''),
+            'uploader': info.get('uploader', ''),
+            'channel': info.get('channel', ''),
+            'channel_id': info.get('channel_id', ''),
+            'tags': info.get('tags', []),
+            'categories': info.get('categories', []),
+            'url': video_url,
+            'has_subtitles': bool(info.get('subtitles')),
+            'has_automatic_captions': bool(info.get('automatic_captions')),
+            'available_subtitles': list(info.get('subtitles', {}).keys()),
+            'available_automatic_captions': list(info.get('automatic_captions', {}).keys()),
+        }
+    
+    def fetch_and_download(self, video_url: str, video_id: str) -> Dict:
+        """
+        用一次 yt-dlp 提取获取视频详情,并下载字幕或音频
+        
+        视频信息只向 YouTube 提取一次: 有可用字幕时只下载字幕,否则复用已提取的信息下载音频。
+        原始音频交给后台 ffmpeg 转码,此时结果中包含 audio_future,其结果为 True 后 audio_file 才可用
+        
+        参数:
+            video_url: 视频 URL
+            video_id: 视频 ID
+            
+        返回:
+            视频详细信息字典 (包含 subtitle_file 或 audio_file),失败时返回空字典
+        """
+        audio_path = self.audio_dir / f"{video_id}.{self.audio_format}"
+        
+        # 已下载的字幕/音频 (启动时扫描一次目录,之后按视频 ID 查找);禁用缓存时重新下载
+        if self.cache_enabled:
+            downloaded_subtitles, downloaded_audio = self._downloaded_files()
+        else:
+            downloaded_subtitles, downloaded_audio = {}, frozenset()
+        subtitle_file = downloaded_subtitles.get(video_id)
+        
+        # 已处理过的视频: 使用缓存的视频信息和已下载的文件
+        cached_info = self._load_cached_info(video_id)
+        if cached_info is not None and (subtitle_file or video_id in downloaded_audio):
+            self.logger.info(f"使用缓存的视频信息: {video_id}")
+            details = self._build_video_details(cached_info, video_url)
+            if subtitle_file:
+                details['subtitle_file'] = subtitle_file
+            else:
+                details['audio_file'] = str(audio_path)
+            return details
+        
+        # 已有字幕文件时不再下载字幕;之前提取过的视频可直接判断是否有所需语言的字幕,没有时直接下载音频
+        want_subtitles = subtitle_file is None and (cached_info is None or self._has_wanted_subtitles(cached_info))
+        
+        self.logger.info(f"正在获取视频详情并下载字幕/音频: {video_id}")
+        
+        # 合并详情、字幕、音频三组选项 (增强防403配置)
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'writesubtitles': want_subtitles,  # 下载手动添加的字幕
+            'writeautomaticsub': want_subtitles,  # 下载自动生成的字幕
+            'subtitleslangs': self.subtitle_languages,  # 字幕语言优先级
+            'subtitlesformat': 'vtt',  # 字幕格式
+            'format': 'bestaudio/best',  # 最佳音频质量 (下载原始音频,转码在后台进行)
+            'outtmpl': {
+                'default': str(self.audio_dir / "%(id)s.source.%(ext)s"),
+                'subtitle': str(self.subtitle_dir / "%(id)s.%(ext)s"),
+            },
+            # 防止403错误的配置
+            'nocheckcertificate': True,
+            **self._network_opts,  # 浏览器 TLS 指纹伪装或 User-Agent
+            'referer': 'https://www.youtube.com/',
+            **self._pacing_opts,
+            'extractor_retries': 3,
+            'fragment_retries': 3,
+            'retry_sleep': 5,
+            'progress_hooks': [self._progress_hook],
+        }
+        
+        try:
+            self._sleep_before_request()
+            ydl = self._get_ydl('download', ydl_opts)
+            # 复用的实例在上一个视频中可能修改过这些选项
+            ydl.params.update(skip_download=False, writesubtitles=want_subtitles, writeautomaticsub=want_subtitles)
+            info = self._retrying(ydl.extract_info, video_url, download=False)
+            
+            if info is None:
+                self.logger.error(f"无法获取视频信息: {video_url}")
+                return {}
+            
+            details = self._build_video_details(info, video_url)
+            
+            # 字幕之前已下载过,只需要更新视频信息
+            if subtitle_file:
+                details['subtitle_file'] = subtitle_file
+                self._save_cached_info(video_id, info)
+                return details
+            
+            # 有可用字幕时只下载字幕
+            if info.get('requested_subtitles'):
+                ydl.params['skip_download'] = True
+                info = self._retrying(ydl.process_ie_result, info, download=True)
+                subtitle_file = self._find_subtitle_file(info)
+                if subtitle_file:
+                    self.logger.info(f"成功下载字幕: {Path(subtitle_file).name}")
+                    details['subtitle_file'] = subtitle_file
+                    self._save_cached_info(video_id, info)
+                    return details
+                ydl.params['skip_download'] = False
+                ydl.params['writesubtitles'] = False
+                ydl.params['writeautomaticsub'] = False
+            
+            self.logger.warning(f"视频 {video_id} 没有可用的字幕")
+            
+            # 没有字幕,下载音频用于转录
+            if audio_path.exists():
+                self.logger.info(f"音频文件已存在: {audio_path}")
+                details['audio_file'] = str(audio_path)
+                self._save_cached_info(video_id, info)
+                return details
+            
+            info = self._retrying(ydl.process_ie_result, info, download=True)
+            source_file = self._find_downloaded_file(info)
+            
+            if source_file:
+                self.logger.info(f"成功下载音频,后台转码: {Path(source_file).name}")
+                details['audio_file'] = str(audio_path)
+                details['audio_future'] = self._transcode_pool.submit(
+                    _transcode_audio, source_file, str(audio_path), self.audio_quality
+                )
+                self._save_cached_info(video_id, info)
+            else:
+                self.logger.error(f"音频文件未找到: {video_id}")
+                details['audio_file'] = None
+            
+            return details
+            
+        except _YTDLP_ERRORS as e:
+            self.logger.error(f"获取视频详情或下载失败: {str(e)}")
+            if _is_throttle_error(e):
+                self._record_throttled(video_id)
+            return {}
+    
+    def _load_cached_info(self, video_id: str) -> Optional[Dict]:
+        """
+        读取有效期内的视频信息缓存
+        
+        参数:
+            video_id: 视频 ID
+            
+        返回:
+            缓存的视频信息,不存在或已过期时返回 None
+        """
+        if not self.cache_enabled:
+            return None
+        
+        cache_file = self.info_cache_dir / f"{video_id}.json"
+        try:
+            if time.time() - cache_file.stat().st_mtime >= self.info_cache_ttl:
+                return None
+            return orjson.loads(cache_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"读取视频信息缓存失败: {str(e)}")
+            return None
+    
+    def _save_cached_info(self, video_id: str, info: Dict):
+        """
+        保存视频信息缓存 (去掉格式列表等大字段,字幕只保留语言列表)
+        
+        参数:
+            video_id: 视频 ID
+            info: yt-dlp 处理后的视频信息
+        """
+        if not self.cache_enabled:
+            return
+        
+        try:
+            info = yt_dlp.YoutubeDL.sanitize_info(info)
+            slim_info = {k: v for k, v in info.items() if k not in _INFO_CACHE_SKIP_KEYS}
+            for key in ('subtitles', 'automatic_captions'):
+                if slim_info.get(key):
+                    slim_info[key] = {lang: [] for lang in slim_info[key]}
+            
+            (self.info_cache_dir / f"{video_id}.json").write_bytes(
+                orjson.dumps(slim_info, option=orjson.OPT_NON_STR_KEYS)
+            )
+        except Exception as e:
+            self.logger.warning(f"保存视频信息缓存失败: {str(e)}")
+    
+    def _downloaded_files(self) -> Tuple[Dict[str, str], frozenset]:
+        """
+        扫描一次字幕和音频目录,建立已下载文件的索引
+        
+        返回:
+            ({video_id: 字幕文件路径}, 已有音频的 video_id 集合)
+        """
+        if self._downloaded_index is None:
+            with self._downloaded_index_lock:
+                if self._downloaded_index is None:
+                    # 同一视频有多个语言的字幕时按字幕语言优先级选择
+                    priority = {lang: i for i, lang in enumerate(self.subtitle_languages)}
+                    subtitles: Dict[str, Tuple[int, str]] = {}
+                    with os.scandir(self.subtitle_dir) as entries:
+                        for entry in entries:
+                            video_id, _, rest = entry.name.partition('.')
+                            lang, _, ext = rest.rpartition('.')
+                            if ext != 'vtt':
+                                continue
+                            rank = priority.get(lang, len(priority))
+                            if video_id not in subtitles or rank < subtitles[video_id][0]:
+                                subtitles[video_id] = (rank, entry.path)
+                    
+                    # 只统计转码完成的音频 ({video_id}.{audio_format}),不含 .source 原始文件
+                    suffix = f".{self.audio_format}"
+                    with os.scandir(self.audio_dir) as entries:
+                        audio = frozenset(
+                            entry.name[:-len(suffix)] for entry in entries
+                            if entry.name.endswith(suffix) and '.' not in entry.name[:-len(suffix)]
+                        )
+                    
+                    self._downloaded_index = ({k: path for k, (_, path) in subtitles.items()}, audio)
+        return self._downloaded_index
+    
+    def _has_wanted_subtitles(self, info: Dict) -> bool:
+        """
+        判断视频是否有所需语言的字幕 (手动字幕或自动字幕)
+        
+        参数:
+            info: yt-dlp 提取的视频信息
+            
+        返回:
+            是否有可下载的字幕
+        """
+        languages = set(self.subtitle_languages)
+        return any(
+            not languages.isdisjoint(info.get(key) or {})
+            for key in ('subtitles', 'automatic_captions')
+        )
+    
+    def _find_downloaded_file(self, info: Dict) -> Optional[str]:
+        """
+        从 yt-dlp 处理后的信息中找到已下载的媒体文件
+        
+        参数:
+            info: yt-dlp 处理后的视频信息
+            
+        返回:
+            文件路径,没有则返回 None
+        """
+        for download in info.get('requested_downloads') or []:
+            filepath = download.get('filepath')
+            if filepath and os.path.exists(filepath):
+                return filepath
+        return None
+    
+    def _find_subtitle_file(self, info: Dict) -> Optional[str]:
+        """
+        从 yt-dlp 处理后的信息中找到已下载的字幕文件 (按字幕语言优先级)
+        
+        参数:
+            info: yt-dlp 处理后的视频信息
+            
+        返回:
+            字幕文件路径,没有则返回 None
+        """
+        for sub_info in (info.get('requested_subtitles') or {}).values():
+            filepath = sub_info.get('filepath')
+            if filepath and os.path.exists(filepath):
+                return filepath
+        return None
+    
     def download_subtitles(self, video_url: str, video_id: str) -> Optional[str]:
         """
         下载视频字幕
@@ -182,8 +745,7 @@ class YouTubeFetcher:
         self.logger.info(f"正在下载字幕: {video_id}")
         
         # 字幕保存目录
-        subtitle_dir = self.raw_dir / "subtitles"
-        subtitle_dir.mkdir(exist_ok=True)
+        subtitle_dir = self.subtitle_dir
         
         # 配置 yt-dlp 选项(增强防403配置)
         ydl_opts = {
@@ -194,29 +756,39 @@ class YouTubeFetcher:
             'subtitleslangs': self.subtitle_languages,  # 字幕语言优先级
             'subtitlesformat': 'vtt',  # 字幕格式
             'skip_download': True,  # 不下载视频
-            'outtmpl': str(subtitle_dir / f"{video_id}.%(ext)s"),  # 输出模板
+            'outtmpl': str(subtitle_dir / "%(id)s.%(ext)s"),  # 输出模板
             # 防止403错误的配置
             'nocheckcertificate': True,
-            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            **self._network_opts,  # 浏览器 TLS 指纹伪装或 User-Agent
             'referer': 'https://www.youtube.com/',
+            **self._pacing_opts,
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-                
-            # 查找下载的字幕文件
-            subtitle_files = list(subtitle_dir.glob(f"{video_id}*.vtt"))
+            self._sleep_before_request()
+            ydl = self._get_ydl('subtitles', ydl_opts)
+            info = self._retrying(ydl.extract_info, video_url, download=True)
+            
+            # 字幕文件路径由 yt-dlp 返回;没有时按字幕语言优先级检查预期的文件名,无需扫描目录
+            subtitle_file = self._find_subtitle_file(info or {})
+            if subtitle_file is None:
+                subtitle_file = next(
+                    (str(path) for path in (subtitle_dir / f"{video_id}.{lang}.vtt" for lang in self.subtitle_languages)
+                     if path.exists()),
+                    None
+                )
             
-            if subtitle_files:
-                self.logger.info(f"成功下载字幕: {subtitle_files[0].name}")
-                return str(subtitle_files[0])
+            if subtitle_file:
+                self.logger.info(f"成功下载字幕: {Path(subtitle_file).name}")
+                return subtitle_file
             else:
                 self.logger.warning(f"视频 {video_id} 没有可用的字幕")
                 return None
                 
-        except Exception as e:
+        except _YTDLP_ERRORS as e:
             self.logger.error(f"下载字幕失败: {str(e)}")
+            if _is_throttle_error(e):
+                self._record_throttled(video_id)
             return None
     
     def download_audio(self, video_url: str, video_id: str) -> Optional[str]:
@@ -233,8 +805,7 @@ class YouTubeFetcher:
         self.logger.info(f"正在下载音频: {video_id}")
         
         # 音频保存目录
-        audio_dir = self.raw_dir / "audio"
-        audio_dir.mkdir(exist_ok=True)
+        audio_dir = self.audio_dir
         
         audio_path = audio_dir / f"{video_id}.{self.audio_format}"
         
@@ -251,22 +822,25 @@ class YouTubeFetcher:
                 'preferredcodec': self.audio_format,  # 音频格式
                 'preferredquality': self.audio_quality,  # 音频质量
             }],
-            'outtmpl': str(audio_dir / f"{video_id}.%(ext)s"),  # 输出模板
+            'outtmpl': str(audio_dir / "%(id)s.%(ext)s"),  # 输出模板
             'quiet': True,
             'no_warnings': True,
             # 防止403错误的配置
             'nocheckcertificate': True,
-            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            **self._network_opts,  # 浏览器 TLS 指纹伪装或 User-Agent
             'referer': 'https://www.youtube.com/',
+            **self._pacing_opts,
             'extractor_retries': 3,
             'fragment_retries': 3,
             'retry_sleep': 5,
+            'progress_hooks': [self._progress_hook],
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-                
+            self._sleep_before_request()
+            ydl = self._get_ydl('audio', ydl_opts)
+            self._retrying(ydl.download, [video_url])
+            
             if audio_path.exists():
                 self.logger.info(f"成功下载音频: {audio_path}")
                 return str(audio_path)
@@ -274,11 +848,151 @@ class YouTubeFetcher:
                 self.logger.error(f"音频文件未找到: {audio_path}")
                 return None
                 
-        except Exception as e:
+        except _YTDLP_ERRORS as e:
             self.logger.error(f"下载音频失败: {str(e)}")
+            if _is_throttle_error(e):
+                self._record_throttled(video_id)
             self.logger.warning(f"视频 {video_id} 无法下载音频,将跳过此视频")
             return None
     
+    def _get_ydl(self, name: str, ydl_opts: Dict) -> 'yt_dlp.YoutubeDL':
+        """
+        获取当前线程复用的 YoutubeDL 实例,首次调用时按 ydl_opts 创建
+        
+        参数:
+            name: 实例名称 (每种用途一个实例,选项中不能包含随视频变化的值)
+            ydl_opts: yt-dlp 选项
+            
+        返回:
+            YoutubeDL 实例
+        """
+        instances = getattr(self._ydl_local, 'instances', None)
+        if instances is None:
+            instances = self._ydl_local.instances = {}
+        
+        ydl = instances.get(name)
+        if ydl is None:
+            ydl = instances[name] = yt_dlp.YoutubeDL(ydl_opts)
+            atexit.register(ydl.close)
+        return ydl
+    
+    def _retrying(self, func, *args, **kwargs):
+        """
+        调用 yt-dlp,遇到网络临时故障时指数退避重试 (限流和其他错误直接抛出)
+        
+        参数:
+            func: yt-dlp 方法
+            *args, **kwargs: 调用参数
+            
+        返回:
+            func 的返回值
+        """
+        retryer = Retrying(
+            stop=stop_after_attempt(self.retry_times),
+            wait=wait_exponential(multiplier=self.retry_delay, max=60),
+            retry=retry_if_exception(_is_transient_error),
+            before_sleep=lambda state: self.logger.warning(
+                f"网络错误,第 {state.attempt_number} 次重试: {str(state.outcome.exception())}"
+            ),
+            reraise=True,
+        )
+        return retryer(func, *args, **kwargs)
+    
+    def _sleep_before_request(self):
+        """请求 YouTube 前随机等待一段时间"""
+        if self.max_sleep > 0:
+            time.sleep(random.uniform(self.min_sleep, self.max_sleep))
+    
+    def _resolve_impersonate_target(self, impersonate: str):
+        """
+        检查 yt-dlp 是否能使用指定的 TLS 指纹伪装目标
+        
+        yt-dlp 只为其支持的 curl_cffi 版本注册伪装处理器,仅能导入 curl_cffi 并不代表可用;
+        目标不可用时每次创建 YoutubeDL 都会报错,因此在这里提前检查一次
+        
+        参数:
+            impersonate: 伪装目标名称 (如 "chrome")
+            
+        返回:
+            可用的伪装目标,不可用时返回 None
+        """
+        from yt_dlp.networking.impersonate import ImpersonateTarget
+        try:
+            target = ImpersonateTarget.from_str(impersonate)
+            with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+                available = ydl._impersonate_target_available(target)
+        except (ValueError, AttributeError, yt_dlp.utils.YoutubeDLError) as e:
+            self.logger.debug(f"无法检查 TLS 指纹伪装目标 {impersonate}: {e}")
+            available = False
+        if not available:
+            self.logger.debug(f"TLS 指纹伪装目标 {impersonate} 不可用 (需要安装 yt-dlp[curl-cffi]),使用固定的浏览器 User-Agent")
+            return None
+        return target
+    
+    def _load_throttled_videos(self) -> Dict[str, float]:
+        """
+        加载仍在跳过期内的限流视频
+        
+        返回:
+            {video_id: 跳过截止时间}
+        """
+        try:
+            throttled = orjson.loads(self.throttle_file.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.warning(f"读取限流记录失败: {str(e)}")
+            return {}
+        
+        now = time.time()
+        return {video_id: until for video_id, until in throttled.items() if until > now}
+    
+    def _record_throttled(self, video_id: str):
+        """
+        记录视频请求被限流,该视频在 throttle_skip_ttl 内跳过 (记录写入缓存目录,下次运行仍然有效)
+        
+        参数:
+            video_id: 视频 ID
+        """
+        self.limiter.record_error()
+        if self.throttle_skip_ttl <= 0:
+            return
+        
+        with self._throttle_lock:
+            now = time.time()
+            self._throttled_videos = {
+                vid: until for vid, until in self._throttled_videos.items() if until > now
+            }
+            self._throttled_videos[video_id] = now + self.throttle_skip_ttl
+            try:
+                self.throttle_file.write_bytes(orjson.dumps(self._throttled_videos))
+            except Exception as e:
+                self.logger.warning(f"保存限流记录失败: {str(e)}")
+    
+    def _is_throttle_suppressed(self, video_id: str) -> bool:
+        """
+        判断视频是否处于限流跳过期内
+        
+        参数:
+            video_id: 视频 ID
+            
+        返回:
+            是否跳过
+        """
+        with self._throttle_lock:
+            skip_until = self._throttled_videos.get(video_id, 0.0)
+        return skip_until > time.time()
+    
+    def _progress_hook(self, d: Dict):
+        """
+        yt-dlp 下载进度回调,下载完成时向并发控制器记录字节数
+        
+        参数:
+            d: yt-dlp 进度信息
+        """
+        if d.get('status') == 'finished':
+            self.limiter.record_bytes(d.get('total_bytes') or d.get('downloaded_bytes') or 0)
+    
     def parse_vtt_subtitles(self, vtt_file: str) -> str:
         """
         解析 VTT 字幕文件,提取纯文本
@@ -290,40 +1004,126 @@ class YouTubeFetcher:
             字幕文本内容
         """
         try:
-            with open(vtt_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # 过滤掉时间戳和空行,只保留文本
+            # 按块读取,每块截到最后一个换行处用正则取出文本行,剩余部分拼到下一块
+            # 长视频的字幕文件不会整体驻留内存
             text_lines = []
-            for line in lines:
-                line = line.strip()
-                # 跳过 WEBVTT 头、时间戳行、空行
-                if (line and 
-                    not line.startswith('WEBVTT') and 
-                    not '-->' in line and 
-                    not line.isdigit()):
-                    text_lines.append(line)
+            tail = ''
+            with open(vtt_file, 'r', encoding='utf-8') as f:
+                while block := f.read(_VTT_READ_SIZE):
+                    block = tail + block
+                    cut = block.rfind('\n') + 1
+                    text_lines.extend(_VTT_TEXT_RE.findall(block[:cut]))
+                    tail = block[cut:]
+            text_lines.extend(_VTT_TEXT_RE.findall(tail))
             
-            return '\n'.join(text_lines)
+            # 合并自动字幕中连续重复的行
+            return '\n'.join(line for line, _ in groupby(text_lines))
             
         except Exception as e:
             self.logger.error(f"解析字幕文件失败: {str(e)}")
             return ""
     
-    def save_cache(self, channel_name: str, videos_data: List[Dict]):
+    def _channel_cache_dir(self, channel_name: str) -> Path:
+        """
+        频道缓存目录 (每个视频一个文件,另有 _index.json 记录视频顺序)
+        
+        参数:
+            channel_name: 频道名称
+            
+        返回:
+            目录路径
+        """
+        return self.cache_dir / "channels" / channel_name
+    
+    def _dumps_cache(self, data) -> bytes:
+        """
+        序列化缓存数据 (启用压缩时使用 zstd 压缩)
+        
+        参数:
+            data: 要缓存的数据
+            
+        返回:
+            JSON 字节串或其 zstd 压缩数据
+        """
+        option = orjson.OPT_NON_STR_KEYS
+        if self.cache_indent:
+            option |= orjson.OPT_INDENT_2
+        data = orjson.dumps(data, option=option)
+        if self.cache_compress_level:
+            # 压缩器不能在线程间共享,每次新建
+            data = zstandard.ZstdCompressor(level=self.cache_compress_level).compress(data)
+        return data
+    
+    def _load_cached_video(self, channel_dir: Path, video_id: str) -> Dict:
+        """
+        读取单个视频的缓存 (兼容压缩和未压缩两种格式)
+        
+        参数:
+            channel_dir: 频道缓存目录
+            video_id: 视频 ID
+            
+        返回:
+            视频数据
+        """
+        # 优先读取当前配置格式的文件,压缩设置改变前写入的缓存仍可读取
+        other_suffix = ".json" if self._cache_suffix == ".json.zst" else ".json.zst"
+        try:
+            cache_file = channel_dir / f"{video_id}{self._cache_suffix}"
+            data = cache_file.read_bytes()
+        except FileNotFoundError:
+            cache_file = channel_dir / f"{video_id}{other_suffix}"
+            data = cache_file.read_bytes()
+        
+        if cache_file.suffix == ".zst":
+            if zstandard is None:
+                raise ImportError("读取压缩缓存需要安装 zstandard")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        return orjson.loads(data)
+    
+    def save_video(self, channel_name: str, video: Dict) -> bool:
+        """
+        保存单个视频数据到频道缓存
+        
+        参数:
+            channel_name: 频道名称
+            video: 视频数据
+            
+        返回:
+            是否保存成功
+        """
+        channel_dir = self._channel_cache_dir(channel_name)
+        
+        try:
+            if channel_dir not in self._channel_dirs:
+                channel_dir.mkdir(parents=True, exist_ok=True)
+                self._channel_dirs.add(channel_dir)
+            (channel_dir / f"{video['video_id']}{self._cache_suffix}").write_bytes(self._dumps_cache(video))
+            return True
+        except Exception as e:
+            self.logger.error(f"保存视频缓存失败: {str(e)}")
+            return False
+    
+    def save_cache(self, channel_name: str, videos_data: List[Dict], videos_saved: bool = False):
         """
         保存视频数据到缓存
         
         参数:
             channel_name: 频道名称
             videos_data: 视频数据列表
+            videos_saved: 各视频是否已通过 save_video 保存 (为 True 时只更新视频顺序索引)
         """
-        cache_file = self.cache_dir / f"{channel_name}_videos.json"
+        channel_dir = self._channel_cache_dir(channel_name)
+        
+        if not videos_saved:
+            for video in videos_data:
+                self.save_video(channel_name, video)
         
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(videos_data, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"缓存已保存: {cache_file}")
+            channel_dir.mkdir(parents=True, exist_ok=True)
+            (channel_dir / "_index.json").write_bytes(
+                orjson.dumps([video['video_id'] for video in videos_data])
+            )
+            self.logger.info(f"缓存已保存: {channel_dir}")
         except Exception as e:
             self.logger.error(f"保存缓存失败: {str(e)}")
     
@@ -337,24 +1137,145 @@ class YouTubeFetcher:
         返回:
             视频数据列表,如果缓存不存在则返回 None
         """
-        cache_file = self.cache_dir / f"{channel_name}_videos.json"
+        channel_dir = self._channel_cache_dir(channel_name)
+        index_file = channel_dir / "_index.json"
         
-        if not cache_file.exists():
+        if not index_file.exists():
             return None
         
         try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                videos_data = json.load(f)
+            videos_data = [
+                self._load_cached_video(channel_dir, video_id)
+                for video_id in orjson.loads(index_file.read_bytes())
+            ]
             self.logger.info(f"从缓存加载了 {len(videos_data)} 个视频")
             return videos_data
         except Exception as e:
             self.logger.error(f"加载缓存失败: {str(e)}")
             return None
     
+    def process_video(self, video: Dict) -> Optional[Dict]:
+        """
+        处理单个视频: 获取详情,下载字幕或音频
+        
+        参数:
+            video: fetch_channel_videos 返回的视频基本信息
+            
+        返回:
+            视频详细数据,失败时返回 None
+        """
+        return self._finish_video(self._download_video(video))
+    
+    def _download_video(self, video: Dict) -> Optional[Dict]:
+        """
+        网络阶段: 获取视频详情并下载字幕或音频
+        
+        参数:
+            video: fetch_channel_videos 返回的视频基本信息
+            
+        返回:
+            视频详细数据,失败时返回 None
+        """
+        video_id = video['video_id']
+        
+        if self._is_throttle_suppressed(video_id):
+            with self._throttle_lock:
+                skip_until = self._throttled_videos.get(video_id, 0.0)
+            self.logger.warning(
+                f"视频 {video_id} 处于限流冷却期,{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(skip_until))} 前跳过"
+            )
+            return None
+        
+        # 由并发控制器决定同时处理的视频数量
+        with self.limiter:
+            try:
+                # 一次提取获取视频详情,并下载字幕或音频
+                return self.fetch_and_download(video['url'], video_id) or None
+            except Exception as e:
+                self.logger.error(f"处理视频 {video_id} 时出错: {str(e)}")
+                return None
+    
+    def _finish_video(self, details: Optional[Dict]) -> Optional[Dict]:
+        """
+        本地阶段: 解析字幕,或等待音频转码完成
+        
+        参数:
+            details: _download_video 返回的视频数据
+            
+        返回:
+            视频详细数据,失败时返回 None
+        """
+        if not details:
+            return None
+        
+        video_id = details.get('video_id')
+        
+        try:
+            subtitle_file = details.get('subtitle_file')
+            
+            if subtitle_file:
+                # 解析字幕文本
+                details['subtitle_text'] = self.parse_vtt_subtitles(subtitle_file)
+                details['needs_transcription'] = False
+            else:
+                # 没有字幕,需要对下载的音频进行转录
+                details['needs_transcription'] = True
+                details['subtitle_text'] = ""
+            
+            audio_future = details.pop('audio_future', None)
+            if audio_future is not None and not audio_future.result():
+                self.logger.error(f"音频转码失败: {video_id}")
+                details['audio_file'] = None
+            
+            return details
+            
+        except Exception as e:
+            self.logger.error(f"处理视频 {video_id} 时出错: {str(e)}")
+            return None
+    
+    async def process_video_async(self, video: Dict) -> Optional[Dict]:
+        """
+        异步处理单个视频 (yt-dlp 为同步库,网络阶段和本地阶段分别在线程中执行)
+        
+        参数:
+            video: fetch_channel_videos 返回的视频基本信息
+            
+        返回:
+            视频详细数据,失败时返回 None
+        """
+        details = await self._download_video_async(video)
+        return await asyncio.to_thread(self._finish_video, details)
+    
+    async def _download_video_async(self, video: Dict) -> Optional[Dict]:
+        """
+        在下载线程池中执行网络阶段
+        
+        参数:
+            video: fetch_channel_videos 返回的视频基本信息
+            
+        返回:
+            视频详细数据,失败时返回 None
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._download_pool, self._download_video, video)
+    
     def fetch_all(self, channel_url: str, use_cache: bool = True) -> List[Dict]:
         """
         获取频道的所有视频数据(包括详细信息和字幕)
         
+        参数:
+            channel_url: YouTube 频道 URL
+            use_cache: 是否使用缓存
+            
+        返回:
+            完整的视频数据列表
+        """
+        return asyncio.run(self.fetch_all_async(channel_url, use_cache))
+    
+    async def fetch_all_async(self, channel_url: str, use_cache: bool = True) -> List[Dict]:
+        """
+        异步获取频道的所有视频数据(包括详细信息和字幕)
+        
         参数:
             channel_url: YouTube 频道 URL
             use_cache: 是否使用缓存
@@ -366,65 +1287,71 @@ class YouTubeFetcher:
         self.logger.info("开始获取 YouTube 频道数据")
         self.logger.info("="*50)
         
-        # 首先获取视频列表
-        videos = self.fetch_channel_videos(channel_url)
+        # 视频列表按页获取,拿到第一个视频即可检查缓存并开始下载
+        video_iter = self.iter_channel_videos(channel_url)
+        video = await asyncio.to_thread(next, video_iter, None)
         
-        if not videos:
+        if video is None:
             self.logger.error("未获取到任何视频")
             return []
         
-        channel_name = videos[0]['channel']
+        channel_name = video['channel']
         
         # 检查缓存
         if use_cache:
-            cached_data = self.load_cache(channel_name)
+            cached_data = await asyncio.to_thread(self.load_cache, channel_name)
             if cached_data:
+                video_iter.close()
                 self.logger.info("使用缓存数据")
                 return cached_data
         
         # 获取每个视频的详细信息
-        all_videos_data = []
+        self.logger.info(f"开始处理视频 (并发数: {self.concurrency})...")
         
-        self.logger.info(f"开始处理 {len(videos)} 个视频...")
+        # 下载协程只做网络请求,下载完成的视频放入队列,由解析协程解析字幕/等待转码,
+        # 网络请求不会因为本地处理而停顿;结果仍按视频列表顺序收集
+        work_queue: asyncio.Queue = asyncio.Queue(maxsize=self.work_queue_size)
+        fetch_sem = asyncio.Semaphore(self.concurrency)
+        results: Dict[int, Optional[Dict]] = {}
         
-        for video in tqdm(videos, desc="处理视频"):
-            video_url = video['url']
-            video_id = video['video_id']
-            
+        async def download(index: int, video: Dict):
             try:
-                # 获取视频详情
-                details = self.fetch_video_details(video_url)
-                
-                if not details:
-                    continue
-                
-                # 尝试下载字幕
-                subtitle_file = self.download_subtitles(video_url, video_id)
-                
-                if subtitle_file:
-                    # 解析字幕文本
-                    subtitle_text = self.parse_vtt_subtitles(subtitle_file)
-                    details['subtitle_text'] = subtitle_text
-                    details['subtitle_file'] = subtitle_file
-                    details['needs_transcription'] = False
-                else:
-                    # 没有字幕,需要下载音频进行转录
-                    audio_file = self.download_audio(video_url, video_id)
-                    details['audio_file'] = audio_file
-                    details['needs_transcription'] = True
-                    details['subtitle_text'] = ""
-                
-                all_videos_data.append(details)
-                
-            except Exception as e:
-                self.logger.error(f"处理视频 {video_id} 时出错: {str(e)}")
-                continue
+                details = await self._download_video_async(video)
+            finally:
+                fetch_sem.release()
+            await work_queue.put((index, details))
+        
+        async def parse(progress: tqdm):
+            while (item := await work_queue.get()) is not None:
+                index, details = item
+                details = results[index] = await asyncio.to_thread(self._finish_video, details)
+                # 每个视频处理完成即写入自己的缓存文件
+                if use_cache and details:
+                    await asyncio.to_thread(self.save_video, channel_name, details)
+                progress.update(1)
+        
+        with tqdm(desc="处理视频") as progress:
+            parsers = [asyncio.create_task(parse(progress)) for _ in range(self.parse_workers)]
+            downloads = []
+            # 有空闲并发名额时才取下一个视频,分页获取与下载同时进行
+            while video is not None:
+                await fetch_sem.acquire()
+                downloads.append(asyncio.create_task(download(len(downloads), video)))
+                progress.total = len(downloads)
+                progress.refresh()
+                video = await asyncio.to_thread(next, video_iter, None)
+            self.logger.info(f"成功获取 {len(downloads)} 个视频信息")
+            await asyncio.gather(*downloads)
+            for _ in parsers:
+                await work_queue.put(None)
+            await asyncio.gather(*parsers)
+        
+        all_videos_data = [results[index] for index in range(len(downloads)) if results[index]]
         
         self.logger.info(f"成功处理 {len(all_videos_data)} 个视频")
         
         # 保存到缓存
         if use_cache:
-            self.save_cache(channel_name, all_videos_data)
+            await asyncio.to_thread(self.save_cache, channel_name, all_videos_data, True)
         
         return all_videos_data
-
@@ -4,6 +4,20 @@
 
 import sys
 import os
+import time
+import shutil
+import importlib
+import importlib.util
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _package_installed(module_name: str) -> bool:
+    """检查包是否已安装 (只查找模块,不执行模块代码)"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
 
 
 def test_python_version():
@@ -26,18 +40,19 @@ def test_imports():
     
     packages = [
         ('yt_dlp', 'yt-dlp'),
-        ('whisper', 'openai-whisper'),
+        ('faster_whisper', 'faster-whisper'),
         ('yaml', 'pyyaml'),
+        ('orjson', 'orjson'),
+        ('tenacity', 'tenacity'),
         ('tqdm', 'tqdm'),
         ('colorama', 'colorama'),
     ]
     
     all_ok = True
     for module_name, package_name in packages:
-        try:
-            __import__(module_name)
+        if _package_installed(module_name):
             print(f"   ✓ {package_name}")
-        except ImportError:
+        else:
             print(f"   ❌ {package_name} 未安装")
             all_ok = False
     
@@ -53,13 +68,14 @@ def test_optional_imports():
         ('anthropic', 'anthropic (用于 Claude 分析)'),
         ('jieba', 'jieba (用于中文分词)'),
         ('wordcloud', 'wordcloud (用于生成词云)'),
+        ('curl_cffi', 'curl_cffi (用于 TLS 指纹伪装)'),
+        ('zstandard', 'zstandard (用于压缩缓存)'),
     ]
     
     for module_name, description in optional_packages:
-        try:
-            __import__(module_name)
+        if _package_installed(module_name):
             print(f"   ✓ {description}")
-        except ImportError:
+        else:
             print(f"   ⚠️  {description} 未安装 (可选)")
 
 
@@ -67,10 +83,29 @@ def test_ffmpeg():
     """测试 ffmpeg"""
     print("\n4. 检查 ffmpeg...")
     
+    ffmpeg_path = shutil.which('ffmpeg')
+    if not ffmpeg_path:
+        print("   ❌ ffmpeg 未安装")
+        print("   安装方法:")
+        print("   - macOS: brew install ffmpeg")
+        print("   - Ubuntu: sudo apt-get install ffmpeg")
+        print("   - Windows: https://ffmpeg.org/download.html")
+        return False
+    
+    # 版本信息缓存一天,且 ffmpeg 更新后失效,避免每次检查都启动 ffmpeg 进程
+    cache_file = Path.home() / '.cache' / 'youtube_an' / 'ffmpeg_version.txt'
+    try:
+        cache_mtime = cache_file.stat().st_mtime
+        if cache_mtime > time.time() - 86400 and cache_mtime > os.path.getmtime(ffmpeg_path):
+            print(f"   ✓ {cache_file.read_text(encoding='utf-8')}")
+            return True
+    except OSError:
+        pass
+    
     import subprocess
     try:
         result = subprocess.run(
-            ['ffmpeg', '-version'],
+            [ffmpeg_path, '-version'],
             capture_output=True,
             text=True,
             timeout=5
@@ -78,17 +113,15 @@ def test_ffmpeg():
         if result.returncode == 0:
             version_line = result.stdout.split('\n')[0]
             print(f"   ✓ {version_line}")
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                cache_file.write_text(version_line, encoding='utf-8')
+            except OSError:
+                pass
             return True
         else:
             print("   ❌ ffmpeg 未正确安装")
             return False
-    except FileNotFoundError:
-        print("   ❌ ffmpeg 未安装")
-        print("   安装方法:")
-        print("   - macOS: brew install ffmpeg")
-        print("   - Ubuntu: sudo apt-get install ffmpeg")
-        print("   - Windows: https://ffmpeg.org/download.html")
-        return False
     except Exception as e:
         print(f"   ⚠️  无法检查 ffmpeg: {str(e)}")
         return False
@@ -98,42 +131,34 @@ def test_modules():
     """测试项目模块"""
     print("\n5. 检查项目模块...")
     
-    try:
-        from modules import YouTubeFetcher
-        print("   ✓ YouTubeFetcher")
-    except ImportError as e:
-        print(f"   ❌ YouTubeFetcher: {str(e)}")
-        return False
-    
-    try:
-        from modules import AudioTranscriber
-        print("   ✓ AudioTranscriber")
-    except ImportError as e:
-        print(f"   ❌ AudioTranscriber: {str(e)}")
-        return False
+    class_names = [
+        'YouTubeFetcher',
+        'AudioTranscriber',
+        'ContentAnalyzer',
+        'StyleSummarizer',
+        'KnowledgeBaseGenerator',
+    ]
     
-    try:
-        from modules import ContentAnalyzer
-        print("   ✓ ContentAnalyzer")
-    except ImportError as e:
-        print(f"   ❌ ContentAnalyzer: {str(e)}")
-        return False
+    def import_class(name):
+        try:
+            getattr(importlib.import_module('modules'), name)
+            return None
+        except ImportError as e:
+            return str(e)
     
-    try:
-        from modules import StyleSummarizer
-        print("   ✓ StyleSummarizer")
-    except ImportError as e:
-        print(f"   ❌ StyleSummarizer: {str(e)}")
-        return False
+    # 各模块依赖互不相同,并行导入让冷启动时的磁盘读取重叠
+    with ThreadPoolExecutor(max_workers=len(class_names)) as executor:
+        errors = list(executor.map(import_class, class_names))
     
-    try:
-        from modules import KnowledgeBaseGenerator
-        print("   ✓ KnowledgeBaseGenerator")
-    except ImportError as e:
-        print(f"   ❌ KnowledgeBaseGenerator: {str(e)}")
-        return False
+    all_ok = True
+    for name, error in zip(class_names, errors):
+        if error is None:
+            print(f"   ✓ {name}")
+        else:
+            print(f"   ❌ {name}: {error}")
+            all_ok = False
     
-    return True
+    return all_ok
 
 
 def test_config():
@@ -0,0 +1,68 @@
+"""
+YouTubeFetcher 测试 (不访问网络)
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("yt_dlp")
+
+from modules.youtube_fetcher import YouTubeFetcher
+
+
+def _make_fetcher(tmp_path, ttl=3600):
+    config = {"youtube": {"throttle_skip_ttl": ttl, "request_sleep": {"max": 0}}}
+    return YouTubeFetcher(config, data_dir=str(tmp_path))
+
+
+def test_throttled_video_is_skipped_in_next_run(tmp_path):
+    """视频被限流后,下一次运行在跳过期内不再请求该视频"""
+    _make_fetcher(tmp_path)._record_throttled("abc")
+    
+    fetcher = _make_fetcher(tmp_path)
+    fetched = []
+    fetcher.fetch_and_download = lambda video_url, video_id: fetched.append(video_id) or {}
+    
+    assert fetcher.process_video({"video_id": "abc", "url": "https://www.youtube.com/watch?v=abc"}) is None
+    assert fetched == []
+
+
+def test_throttle_skip_expires(tmp_path):
+    """跳过期结束后视频会被重新处理"""
+    fetcher = _make_fetcher(tmp_path)
+    fetcher._record_throttled("abc")
+    fetcher._throttled_videos["abc"] = time.time() - 1
+    
+    fetched = []
+    fetcher.fetch_and_download = lambda video_url, video_id: fetched.append(video_id) or {}
+    fetcher.process_video({"video_id": "abc", "url": "https://www.youtube.com/watch?v=abc"})
+    
+    assert fetched == ["abc"]
+    assert not _make_fetcher(tmp_path)._is_throttle_suppressed("xyz")
+
+
+class _FakeYoutubeDL:
+    """只返回基本视频信息、不访问网络的 YoutubeDL 替身"""
+    
+    def __init__(self, ydl_opts):
+        self.params = dict(ydl_opts)
+    
+    def extract_info(self, video_url, download=False):
+        return {"id": "abc", "title": "t"}
+    
+    def process_ie_result(self, info, download=True):
+        return info
+
+
+def test_no_cache_ignores_downloaded_subtitles(tmp_path):
+    """禁用缓存时不复用已下载的字幕文件,重新请求字幕"""
+    fetcher = YouTubeFetcher({"system": {"cache_enabled": False}, "youtube": {"request_sleep": {"max": 0}}}, data_dir=str(tmp_path))
+    (fetcher.subtitle_dir / "abc.en.vtt").write_text("WEBVTT\n", encoding="utf-8")
+    ydl = _FakeYoutubeDL({})
+    fetcher._get_ydl = lambda name, ydl_opts: ydl
+    
+    details = fetcher.fetch_and_download("https://www.youtube.com/watch?v=abc", "abc")
+    
+    assert "subtitle_file" not in details
+    assert ydl.params["writesubtitles"] is True